@@ -0,0 +1,145 @@
+# Lazy asset registry, an optional pre-decoded cache bundle and fallbacks for machines without audio or a display.
+# Build the bundle once with: python assets.py --build
+import argparse
+import os
+import pickle
+import zlib
+from typing import Optional
+import pygame as pg
+
+BUNDLE = "assets/cache.bundle"
+BUNDLE_VERSION = 1
+
+REGISTRY: dict[str, tuple[str, str]] = {
+    "explosion": ("sound", "assets/explosion.wav"),
+    "selection": ("sound", "assets/selection.wav"),
+    "detection": ("sound", "assets/detection.wav"),
+    "rule_changed": ("sound", "assets/rule_changed.wav"),
+    "score_change": ("sound", "assets/score_change.wav"),
+    "thumbnail": ("image", "assets/thumbnail.png"),
+}
+
+# Classes
+class NullSound:
+    def play(self, *args, **kwargs):
+        return None
+
+    def set_volume(self, volume: float):
+        pass
+
+class NullChannel(NullSound):
+    pass
+
+class AssetManager:
+    def __init__(self, bundle: Optional[str] = BUNDLE):
+        self.bundle_path: Optional[str] = bundle
+        self.bundle: Optional[dict] = None
+        self.bundle_checked: bool = False
+        self.audio: Optional[bool] = None
+        self.sounds: dict[str, object] = dict()
+        self.images: dict[str, pg.Surface] = dict()
+        self.fonts: dict[tuple[str, int, bool, bool], pg.font.Font] = dict()
+        self.loads: int = 0
+
+    # Backends
+    def audio_available(self) -> bool:
+        if (self.audio is None):
+            try:
+                if (pg.mixer.get_init() is None): pg.mixer.init()
+                self.audio = True
+            except pg.error:
+                self.audio = False
+        return self.audio
+
+    def channel(self, index: int):
+        return pg.mixer.Channel(index) if self.audio_available() else NullChannel()
+
+    # Bundle
+    def cached(self, kind: str, name: str):
+        if (not self.bundle_checked):
+            self.bundle_checked = True
+            if (not self.bundle_path is None and os.path.exists(self.bundle_path)):
+                with open(self.bundle_path, "rb") as file:
+                    bundle = pickle.loads(zlib.decompress(file.read()))
+                if (bundle.get("version") == BUNDLE_VERSION): self.bundle = bundle
+        if (self.bundle is None): return None
+        # Raw samples are only valid for the mixer format they were decoded with
+        if (kind == "sound" and self.bundle["mixer"] != pg.mixer.get_init()): return None
+        return self.bundle[kind + "s"].get(name)
+
+    # Loading
+    def sound(self, name: str):
+        sound = self.sounds.get(name)
+        if (sound is None):
+            if (not self.audio_available()):
+                sound = NullSound()
+            else:
+                raw = self.cached("sound", name)
+                sound = pg.mixer.Sound(buffer=raw) if not raw is None else pg.mixer.Sound(REGISTRY[name][1])
+                self.loads += 1
+            self.sounds[name] = sound
+        return sound
+
+    def image(self, name: str) -> pg.Surface:
+        image = self.images.get(name)
+        if (image is None):
+            cached = self.cached("image", name)
+            if (not cached is None):
+                size, raw = cached
+                image = pg.image.frombuffer(raw, size, "RGBA")
+            else:
+                image = pg.image.load(REGISTRY[name][1])
+            self.loads += 1
+            self.images[name] = image
+        return image
+
+    def font(self, name: str, size: int, bold: bool = False, italic: bool = False) -> pg.font.Font:
+        key = (name, size, bold, italic)
+        font = self.fonts.get(key)
+        if (font is None):
+            if (not pg.font.get_init()): pg.font.init()
+            font = self.fonts[key] = pg.font.SysFont(*key)
+            self.loads += 1
+        return font
+
+    def build(self, path: str = BUNDLE):
+        # Decodes every registered asset once and stores the raw data, so later cold starts skip WAV/PNG parsing
+        if (not self.audio_available()): raise RuntimeError("building a bundle needs an audio device to fix the sample format")
+        sounds, images = dict(), dict()
+        for name, (kind, source) in REGISTRY.items():
+            if (kind == "sound"):
+                sounds[name] = pg.mixer.Sound(source).get_raw()
+            elif (kind == "image"):
+                image = pg.image.load(source)
+                images[name] = (image.get_size(), pg.image.tobytes(image, "RGBA"))
+        bundle = {"version": BUNDLE_VERSION, "mixer": pg.mixer.get_init(), "sounds": sounds, "images": images}
+        with open(path, "wb") as file:
+            file.write(zlib.compress(pickle.dumps(bundle, pickle.HIGHEST_PROTOCOL), 1))
+
+manager: AssetManager = AssetManager()
+
+# Functions
+
+def open_display(size: tuple[int, int], caption: str) -> pg.Surface:
+    # Without a usable video device the game still runs, drawing into SDL's off-screen dummy driver
+    try:
+        pg.display.init()
+        screen = pg.display.set_mode(size)
+    except pg.error:
+        pg.display.quit()
+        os.environ["SDL_VIDEODRIVER"] = "dummy"
+        pg.display.init()
+        screen = pg.display.set_mode(size)
+    pg.display.set_caption(caption)
+    pg.display.set_icon(manager.image("thumbnail"))
+    return screen
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-decode the game's assets into a cache bundle.")
+    parser.add_argument("--build", metavar="PATH", nargs="?", const=BUNDLE, default=BUNDLE)
+    args = parser.parse_args()
+    manager.build(args.build)
+    print(f"wrote {args.build} ({os.path.getsize(args.build)} bytes)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+# Scenario benchmarks for the hot paths, with a JSONL history and a regression gate against a stored baseline.
+# Run from the repository root:
+#   python -m benchmarks.harness                     time every scenario, append to the history, compare to the baseline
+#   python -m benchmarks.harness --save-baseline     make this run the new baseline
+#   python -m benchmarks.harness --threshold 15      fail when a median gets more than 15% slower than the baseline
+#   python -m benchmarks.harness --bundle ''         time the cold start without the pre-decoded asset bundle
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+from typing import Callable, Optional
+import numpy as np
+import pygame as pg
+from pygame import Vector2
+import guidance
+from simulation import Simulation, Plane, Rocket, Explosion, Rule, FlyRuler, W, H
+from render import Renderer
+
+HISTORY = "benchmarks/history.jsonl"
+# Cold start in a fresh interpreter, from before the first game import to the first presented frame
+STARTUP = "import time; start = time.perf_counter(); import main; main.create_session(0).frame(); print((time.perf_counter()-start)*1000)"
+BASELINE = "benchmarks/baseline.json"
+
+# Scenarios
+
+def scenario(planes: int, rockets: int, smoke: int, rules: int, explosions: int = 0) -> Callable[[], Simulation]:
+    def build() -> Simulation:
+        random.seed(0)
+        sim = Simulation(seed=0, plane_interval=(10**9, 10**9), rule_interval=(10**9, 10**9))
+        targets = list()
+        for _ in range(planes):
+            plane = sim.spawn_plane()
+            plane.position = Vector2(random.random()*W*0.85, random.random()*H)
+            targets.append(plane)
+        for _ in range(rules):
+            sim.flyRuler.rule_add(Rule(random.choice(FlyRuler.countryes), random.choice(FlyRuler.purposes + ["ALL"]), random.choice(FlyRuler.zones)))
+        sim.run(1)
+        launched = [Rocket(sim, targets[i % len(targets)]) for i in range(rockets)]
+        for rocket in launched: sim.gamehandler.add(rocket)
+        if (rockets > 0):
+            # Rockets sit on the pad for the first guidance stage, so step past it; then each target is put a little further
+            # down its rocket's path, which spreads detonations (and their blast queries) over the timed ticks
+            sim.run(int(guidance.stage_times[0]/sim.dt)+2)
+            for i, rocket in enumerate(launched):
+                rocket.target.position = rocket.position + rocket.direction*(6+i*0.6)
+        for _ in range(explosions):
+            sim.gamehandler.add(Explosion(sim, Vector2(random.random()*W*0.85, random.random()*H)))
+        if (smoke > 0):
+            rng = np.random.default_rng(0)
+            sim.particles.emit(rng.random((smoke, 2))*(W*0.85, H), rng.integers(1, 6, smoke), np.full(smoke, 1e9))
+        sim.run(1)
+        return sim
+    return build
+
+SCENARIOS: dict[str, Callable[[], Simulation]] = {
+    "idle": scenario(planes=1, rockets=0, smoke=0, rules=0),
+    "traffic": scenario(planes=500, rockets=0, smoke=0, rules=20),
+    "engagement": scenario(planes=500, rockets=50, smoke=10000, rules=200, explosions=10),
+}
+
+# Functions
+
+def timed(function: Callable[[], object], repeat: int) -> dict[str, float]:
+    samples = list()
+    for _ in range(repeat):
+        start = time.perf_counter_ns()
+        function()
+        samples.append((time.perf_counter_ns()-start)/1e6)
+    samples.sort()
+    return {"median_ms": statistics.median(samples), "p95_ms": samples[min(len(samples)-1, int(len(samples)*0.95))], "samples": len(samples)}
+
+def measure(build: Callable[[], Simulation], repeat: int) -> dict[str, dict[str, float]]:
+    # Every metric gets a fresh copy of the scenario, so nothing one measurement does leaks into the next
+    results = dict()
+    sim = build()
+    results["update"] = timed(sim.step, repeat)
+
+    sim = build()
+    store = sim.gamehandler.store(Plane)
+    results["detection"] = timed(lambda: sim.world.scan(store.position[:store.count]), repeat)
+
+    sim = build()
+    results["rules"] = timed(sim.flyRuler.check_planes, repeat)
+
+    sim = build()
+    screen = pg.Surface((W, H))
+    renderer = Renderer(sim, screen)
+    def draw():
+        renderer.full_redraw = True
+        renderer.draw(Vector2(W/2, H/2))
+    results["draw"] = timed(draw, repeat)
+    return results
+
+def startup(runs: int, bundle: Optional[str]) -> dict[str, float]:
+    environment = dict(os.environ, SDL_VIDEODRIVER="dummy", SDL_AUDIODRIVER="dummy", PYGAME_HIDE_SUPPORT_PROMPT="1")
+    code = STARTUP if bundle is None else STARTUP.replace("import main;", f"import main, assets; assets.manager.bundle_path = {bundle!r};")
+    samples = sorted(float(subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True, env=environment).stdout.split()[-1]) for _ in range(runs))
+    return {"median_ms": statistics.median(samples), "p95_ms": samples[min(len(samples)-1, int(len(samples)*0.95))], "samples": len(samples)}
+
+def commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(results: dict, baseline: dict, threshold: float, min_ms: float) -> list[str]:
+    regressions = list()
+    for name, metrics in results.items():
+        for metric, values in metrics.items():
+            before = baseline.get(name, {}).get(metric)
+            if (before is None): continue
+            change = (values["median_ms"]-before["median_ms"])/before["median_ms"]*100
+            # Very short paths jitter by more than any sensible threshold, so tiny absolute changes never count
+            if (change > threshold and values["median_ms"]-before["median_ms"] > min_ms): regressions.append(f"{name}.{metric}: {before['median_ms']:.3f} -> {values['median_ms']:.3f} ms (+{change:.1f}%)")
+    return regressions
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Time update, detection, rule evaluation and draw per scenario.")
+    parser.add_argument("scenarios", nargs="*", default=list(SCENARIOS), help=f"any of {', '.join(SCENARIOS)}")
+    parser.add_argument("--repeat", type=int, default=60, help="samples per metric")
+    parser.add_argument("--threshold", type=float, default=20, help="allowed slowdown of a median against the baseline, in percent")
+    parser.add_argument("--min-ms", type=float, default=0.02, help="ignore slowdowns smaller than this many milliseconds")
+    parser.add_argument("--startup-runs", type=int, default=5, help="fresh interpreters timed from import to first frame, 0 to skip")
+    parser.add_argument("--bundle", metavar="PATH", default=None, help="asset bundle for the startup runs (default: whatever the game would pick up)")
+    parser.add_argument("--history", default=HISTORY)
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    args = parser.parse_args(argv)
+
+    pg.font.init()
+    results = dict()
+    print(f"{'scenario':>12} {'metric':>10} | {'median ms':>10} {'p95 ms':>10}")
+    for name in args.scenarios:
+        results[name] = measure(SCENARIOS[name], args.repeat)
+        for metric, values in results[name].items():
+            print(f"{name:>12} {metric:>10} | {values['median_ms']:>10.3f} {values['p95_ms']:>10.3f}")
+    if (args.startup_runs > 0):
+        values = startup(args.startup_runs, args.bundle)
+        results["startup"] = {"first_frame": values}
+        print(f"{'startup':>12} {'first_frame':>10} | {values['median_ms']:>10.3f} {values['p95_ms']:>10.3f}")
+
+    record = {
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "commit": commit(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pygame": pg.version.ver,
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "results": results,
+    }
+    with open(args.history, "a") as file:
+        file.write(json.dumps(record) + "\n")
+
+    if (args.save_baseline):
+        with open(args.baseline, "w") as file:
+            json.dump(record, file, indent=1)
+        print(f"baseline saved to {args.baseline}")
+        return 0
+    if (not os.path.exists(args.baseline)):
+        print(f"no baseline at {args.baseline}; run with --save-baseline to create one")
+        return 0
+    with open(args.baseline) as file:
+        baseline = json.load(file)
+    regressions = compare(results, baseline["results"], args.threshold, args.min_ms)
+    for line in regressions: print(f"REGRESSION {line}", file=sys.stderr)
+    print(f"{len(regressions)} regressions against {args.baseline} (commit {baseline.get('commit')}, threshold {args.threshold:g}%)")
+    return 1 if len(regressions) > 0 else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
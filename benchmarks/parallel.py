@@ -0,0 +1,53 @@
+# Scaling of parallel plane integration from 1 to N worker processes, checked bit for bit against the serial path.
+# Run from the repository root: python -m benchmarks.parallel [planes] [ticks]
+import os
+import random
+import sys
+import time
+from pygame import Vector2
+from simulation import Simulation, Plane, FPS
+from world import World
+
+EXTENT = 10000
+
+def build(planes: int, seed: int) -> Simulation:
+    random.seed(seed)
+    sim = Simulation(plane_interval=(10**9, 10**9), world=World.grid(EXTENT, EXTENT))
+    for _ in range(planes):
+        plane = sim.spawn_plane()
+        plane.position = Vector2(random.random()*EXTENT, random.random()*EXTENT)
+    return sim
+
+def state(sim: Simulation) -> tuple[bytes, ...]:
+    store = sim.gamehandler.store(Plane)
+    n = store.count
+    return tuple(getattr(store, name)[:n].tobytes() for name in store.columns()) + (bytes(str(sim.score.get()), "ascii"),)
+
+def run(planes: int, ticks: int, workers: int) -> tuple[float, tuple[bytes, ...]]:
+    sim = build(planes, 0)
+    sim.use_workers(workers)
+    try:
+        sim.run(1)
+        start = time.perf_counter()
+        sim.run(ticks)
+        elapsed = time.perf_counter()-start
+        return elapsed/ticks*1000, state(sim)
+    finally:
+        sim.close()
+
+def main():
+    planes = int(sys.argv[1]) if len(sys.argv) > 1 else 30000
+    ticks = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    cores = os.cpu_count() or 1
+    print(f"{planes} planes, {ticks} ticks, {cores} cores")
+    print(f"{'workers':>7} | {'ms/tick':>8} {'speedup':>8} {'x real-time':>12} {'matches serial':>15}")
+    serial, expected = run(planes, ticks, 0)
+    print(f"{'serial':>7} | {serial:>8.2f} {1:>8.2f} {1000/FPS/serial:>12.1f} {'-':>15}")
+    workers = 1
+    while workers <= max(cores, 2):
+        ms, result = run(planes, ticks, workers)
+        print(f"{workers:>7} | {ms:>8.2f} {serial/ms:>8.2f} {1000/FPS/ms:>12.1f} {str(result == expected):>15}")
+        workers *= 2
+
+if __name__ == "__main__":
+    main()
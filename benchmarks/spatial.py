@@ -0,0 +1,59 @@
+# Query latency of the spatial grid against a linear scan over GameHandler.gameobjects.
+# Run from the repository root: python -m benchmarks.spatial
+import random
+import time
+from pygame import Vector2
+from simulation import Simulation, Plane, Detection, W, H
+
+PLANE_COUNTS = (100, 1000, 10000)
+OTHER_COUNTS = (0, 10000)
+QUERIES = 2000
+
+def linear_closest(sim: Simulation, position: Vector2):
+    objects = list(filter(lambda x: type(x) is Plane, sim.gamehandler.get()))
+    if len(objects) == 0: return None
+    closest = objects[0]
+    for object in objects:
+        if (position-object.position).length() < (position-closest.position).length(): closest = object
+    return closest
+
+def linear_radius(sim: Simulation, position: Vector2, radius: float):
+    return [x for x in sim.gamehandler.get() if type(x) is Plane and (x.position - position).length() <= radius]
+
+def timed(function, points: list[Vector2]) -> float:
+    start = time.perf_counter()
+    for point in points: function(point)
+    return (time.perf_counter()-start)/len(points)*1e6
+
+def build(planes: int, others: int) -> Simulation:
+    sim = Simulation()
+    for _ in range(planes):
+        # Scatter the traffic over the scope instead of leaving it bunched on the spawn edges
+        plane = sim.spawn_plane()
+        plane.position = Vector2(random.random()*W*0.85, random.random()*H)
+    for _ in range(others):
+        # Long-lived detection rings stand in for the rest of the world the linear scan has to skip over
+        detection = Detection(sim, Vector2(random.random()*W, random.random()*H))
+        detection.radius = 1e9
+        sim.gamehandler.add(detection)
+    sim.run(60)
+    return sim
+
+def main():
+    random.seed(0)
+    print(f"{'planes':>7} {'others':>7} | {'closest linear':>15} {'closest grid':>13} | {'radius linear':>14} {'radius grid':>12}  (us/query)")
+    for planes in PLANE_COUNTS:
+        for others in OTHER_COUNTS:
+            sim = build(planes, others)
+            points = [Vector2(random.random()*W, random.random()*H) for _ in range(QUERIES)]
+            linear_points = points[:max(10, QUERIES*100//(planes+others))]
+            results = (
+                timed(lambda p: linear_closest(sim, p), linear_points),
+                timed(lambda p: sim.gamehandler.findClosest(Plane, p), points),
+                timed(lambda p: linear_radius(sim, p, 10), linear_points),
+                timed(lambda p: sim.gamehandler.findInRadius(Plane, p, 10), points),
+            )
+            print(f"{planes:>7} {others:>7} | {results[0]:>15.1f} {results[1]:>13.1f} | {results[2]:>14.1f} {results[3]:>12.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+# Headless step rate of a large multi-site world against the real-time budget of one tick.
+# Run from the repository root: python -m benchmarks.world
+import random
+import time
+from pygame import Vector2
+from simulation import Simulation, FPS
+from world import World
+
+PLANE_COUNTS = (1000, 10000, 30000)
+EXTENT = 10000
+TICKS = 300
+
+def build(planes: int) -> Simulation:
+    sim = Simulation(plane_interval=(10**9, 10**9), world=World.grid(EXTENT, EXTENT))
+    for _ in range(planes):
+        plane = sim.spawn_plane()
+        plane.position = Vector2(random.random()*EXTENT, random.random()*EXTENT)
+    sim.run(1)
+    return sim
+
+def main():
+    random.seed(0)
+    print(f"{'planes':>7} {'sites':>6} {'sectors':>8} | {'ms/tick':>8} {'x real-time':>12} {'handoffs':>9} {'detections':>11}")
+    for planes in PLANE_COUNTS:
+        sim = build(planes)
+        events = {"handoff": 0, "detection": 0}
+        sim.subscribe(lambda event, source: events.__setitem__(event, events[event]+1) if event in events else None)
+        start = time.perf_counter()
+        sim.run(TICKS)
+        ms = (time.perf_counter()-start)/TICKS*1000
+        print(f"{planes:>7} {len(sim.world.sites):>6} {sim.world.sector_count():>8} | {ms:>8.2f} {1000/FPS/ms:>12.1f} {events['handoff']:>9} {events['detection']:>11}")
+
+if __name__ == "__main__":
+    main()
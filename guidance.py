@@ -0,0 +1,116 @@
+# Batched rocket guidance over NumPy arrays.
+# Positions are in pixels, speeds in pixels per reference tick (1000/FPS ms), times in simulation milliseconds.
+import math
+from typing import Optional
+import numpy as np
+
+TICK: float = 1000/60
+MODES: tuple[str, ...] = ("pursuit", "lead", "proportional")
+
+# Stage profile
+# Stage n starts stage_times[n-1] ms after launch and pulls speed toward stage_speeds[n] at stage_rates[n] per reference tick
+stage_times: tuple[float, ...] = (2000, 4000, 8000)
+stage_speeds: tuple[float, ...] = (0, 1/2, 0.35/2, 0)
+stage_rates: tuple[float, ...] = (0.0035, 0.04, 0.0035, 0.0035)
+burnout_speed: float = 0.05
+fuse_distance: float = 5
+navigation_gain: float = 3
+max_turn: float = 0.2
+
+# Functions
+
+def normalize(vectors: np.ndarray, fallback: np.ndarray) -> np.ndarray:
+    length = np.hypot(vectors[:, 0], vectors[:, 1])
+    ok = length > 1e-9
+    result = fallback.copy()
+    result[ok] = vectors[ok]/length[ok, None]
+    return result
+
+def stage_of(age: np.ndarray) -> np.ndarray:
+    return np.searchsorted(np.asarray(stage_times), age, side="right").astype(np.int32)
+
+def accelerate(speed: np.ndarray, stage: np.ndarray, scale: float) -> np.ndarray:
+    # Exponential approach, so the same curve comes out whatever the step size
+    rate = 1-(1-np.asarray(stage_rates)[stage])**scale
+    return speed + (np.asarray(stage_speeds)[stage]-speed)*rate
+
+def intercept_time(delta: np.ndarray, target_velocity: np.ndarray, speed: np.ndarray) -> np.ndarray:
+    # Smallest t >= 0 with |delta + target_velocity*t| = speed*t, NaN where a constant-speed rocket can never catch up
+    a = np.einsum("ij,ij->i", target_velocity, target_velocity) - speed*speed
+    b = 2*np.einsum("ij,ij->i", delta, target_velocity)
+    c = np.einsum("ij,ij->i", delta, delta)
+    t = np.full(len(delta), np.nan)
+    linear = np.abs(a) < 1e-12
+    with np.errstate(divide="ignore", invalid="ignore"):
+        closing = linear & (b < 0)
+        t[closing] = -c[closing]/b[closing]
+        root = np.sqrt(b*b - 4*a*c)
+        near = (-b - root)/(2*a)
+        far = (-b + root)/(2*a)
+    near = np.where(near >= 0, near, np.nan)
+    far = np.where(far >= 0, far, np.nan)
+    quadratic = ~linear & (b*b - 4*a*c >= 0)
+    t[quadratic] = np.fmin(near, far)[quadratic]
+    t[c == 0] = 0
+    return t
+
+def pursuit(direction: np.ndarray, delta: np.ndarray) -> np.ndarray:
+    return normalize(delta, direction)
+
+def lead(direction: np.ndarray, delta: np.ndarray, target_velocity: np.ndarray, speed: np.ndarray) -> np.ndarray:
+    t = intercept_time(delta, target_velocity, speed)
+    aim = np.where(np.isnan(t)[:, None], delta, delta + target_velocity*np.nan_to_num(t)[:, None])
+    return normalize(aim, direction)
+
+def proportional(direction: np.ndarray, delta: np.ndarray, target_velocity: np.ndarray, speed: np.ndarray, scale: float) -> np.ndarray:
+    # Turn by N times the line-of-sight rate: omega = (r x v_rel) / |r|^2
+    relative = target_velocity - direction*speed[:, None]
+    r2 = np.einsum("ij,ij->i", delta, delta)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        los_rate = np.where(r2 > 1e-9, (delta[:, 0]*relative[:, 1] - delta[:, 1]*relative[:, 0])/r2, 0)
+    turn = np.clip(navigation_gain*los_rate, -max_turn, max_turn)*scale
+    cos, sin = np.cos(turn), np.sin(turn)
+    turned = np.column_stack((direction[:, 0]*cos - direction[:, 1]*sin, direction[:, 0]*sin + direction[:, 1]*cos))
+    return normalize(turned, direction)
+
+def steer(mode: str, direction: np.ndarray, delta: np.ndarray, target_velocity: np.ndarray, speed: np.ndarray, stage: np.ndarray, scale: float) -> np.ndarray:
+    if (mode == "pursuit"): return pursuit(direction, delta)
+    # On the pad there is no speed to steer with, so the rocket is laid on the lead point of its boost speed instead
+    aim = lead(direction, delta, target_velocity, np.where(stage <= 1, stage_speeds[1], np.maximum(speed, 1e-6)))
+    if (mode == "lead"): return aim
+    return np.where((stage == 0)[:, None], aim, proportional(direction, delta, target_velocity, speed, scale))
+
+_ranges: dict[float, np.ndarray] = dict()
+
+def range_table(dt: float) -> np.ndarray:
+    # Distance flown after k steps of the stage profile, until the motor burns out
+    if (not dt in _ranges):
+        scale = dt/TICK
+        speed = np.zeros(1)
+        flown = [0.0]
+        k = 0
+        while True:
+            k += 1
+            stage = stage_of(np.array([k*dt]))
+            if (stage[0] >= 2 and speed[0] <= burnout_speed): break
+            speed = accelerate(speed, stage, scale)
+            flown.append(flown[-1] + speed[0]*scale)
+        _ranges[dt] = np.array(flown)
+    return _ranges[dt]
+
+def predict_intercept(origin: np.ndarray, position: np.ndarray, target_velocity: np.ndarray, dt: float) -> np.ndarray:
+    # Earliest time (ms) at which a rocket launched now on a straight lead course can reach each target, NaN if never.
+    # The target track is closed form, so this is one vectorized comparison against the tabulated range profile.
+    flown = range_table(dt)
+    steps = np.arange(len(flown))
+    scale = dt/TICK
+    delta = position - origin
+    x = delta[:, 0, None] + target_velocity[:, 0, None]*steps*scale
+    y = delta[:, 1, None] + target_velocity[:, 1, None]*steps*scale
+    reached = flown[None, :] + fuse_distance >= np.hypot(x, y)
+    hit = reached.any(axis=1)
+    return np.where(hit, reached.argmax(axis=1)*dt, np.nan)
+
+def predict(origin, position, target_velocity, dt: float) -> Optional[float]:
+    t = predict_intercept(np.asarray(origin, float), np.asarray([tuple(position)], float), np.asarray([tuple(target_velocity)], float), dt)[0]
+    return None if math.isnan(t) else float(t)
@@ -0,0 +1,228 @@
+# Seeded headless episodes on a process pool, streamed to a results file.
+# Example: python montecarlo.py -n 200 --duration 600 --plane-interval 3000 9000 -o results.parquet
+# Results are columnar (Parquet or Arrow IPC) through pyarrow; CSV remains available for machines without it.
+import argparse
+import csv
+import importlib.util
+import multiprocessing as mp
+import os
+import random
+import sys
+import time
+from typing import Optional
+from simulation import Simulation, Plane, Score, FPS
+from telemetry import Telemetry, FORMATS
+
+COLUMNS: tuple[str, ...] = ("episode", "seed", "score", "takedowns", "wrongful_kills", "escapes", "returned", "hostile_escapes", "rockets", "spawned", "ticks", "wall_seconds")
+
+# Classes
+class Operator:
+    def __init__(self, sim: Simulation, reaction: float, misfire: float, rng: random.Random):
+        self.sim: Simulation = sim
+        self.rng: random.Random = rng
+        self.reaction: float = reaction
+        self.misfire: float = misfire
+        self.next_action: float = 0
+        self.engaged: set[int] = set()
+        self.messaged: dict[int, float] = dict()
+        self.rockets: int = 0
+
+    def act(self):
+        sim = self.sim
+        if (sim.time < self.next_action): return
+        self.next_action = sim.time + self.reaction
+        # Ids are never reused, so entries for planes that are gone can be forgotten and long episodes stay bounded
+        self.engaged = {id for id in self.engaged if not sim.gamehandler.entity(id) is None}
+        self.messaged = {id: sent for id, sent in self.messaged.items() if not sim.gamehandler.entity(id) is None}
+        planes = [p for p in sim.gamehandler.get() if type(p) is Plane and p.spotted and not p.id in self.engaged and p.site >= 0]
+        if (len(planes) == 0): return
+        hostile = [p for p in planes if p.allow_takedown and not p.get_back]
+        if (self.rng.random() < self.misfire):
+            self.fire(self.rng.choice(planes))
+            return
+        for plane in hostile:
+            # Civil traffic gets a chance to turn back before it is engaged
+            if (plane.purpose == "CIVIL" and not plane.id in self.messaged):
+                self.messaged[plane.id] = sim.time
+                sim.select_plane(plane.position)
+                sim.send_message()
+                return
+            if (sim.time - self.messaged.get(plane.id, -self.reaction*3) >= self.reaction*3):
+                self.fire(plane)
+                return
+
+    def fire(self, plane: Plane):
+        self.sim.select_plane(plane.position)
+        if (self.sim.radar.selected_plane is None): return
+        self.engaged.add(self.sim.radar.selected_plane.id)
+        self.sim.launch_rocket()
+        self.rockets += 1
+
+class Tally:
+    def __init__(self):
+        self.takedowns: int = 0
+        self.wrongful_kills: int = 0
+        self.escapes: int = 0
+        self.returned: int = 0
+        self.hostile_escapes: int = 0
+        self.spawned: int = 0
+
+    def __call__(self, event: str, source: object):
+        if (event == "spawn"):
+            self.spawned += 1
+        elif (event == "takedown"):
+            if (source.allow_takedown): self.takedowns += 1
+            else: self.wrongful_kills += 1
+        elif (event == "escape"):
+            self.escapes += 1
+            if (source.get_back): self.returned += 1
+            elif (source.allow_takedown): self.hostile_escapes += 1
+
+class CsvSink:
+    def __init__(self, path: str):
+        self.file = open(path, "w", newline="")
+        self.writer = csv.DictWriter(self.file, COLUMNS)
+        self.writer.writeheader()
+
+    def write(self, row: dict):
+        self.writer.writerow(row)
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+class ArrowSink:
+    def __init__(self, path: str, batch_size: int):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        self.pa = pa
+        self.schema = pa.schema([(name, pa.float64() if name in ("wall_seconds",) else pa.int64()) for name in COLUMNS])
+        self.batch_size: int = batch_size
+        self.rows: list[dict] = list()
+        if (path.endswith(".parquet")):
+            self.writer = pq.ParquetWriter(path, self.schema)
+        else:
+            self.sink = pa.OSFile(path, "wb")
+            self.writer = pa.ipc.new_stream(self.sink, self.schema)
+
+    def write(self, row: dict):
+        self.rows.append(row)
+        if (len(self.rows) >= self.batch_size): self.flush()
+
+    def flush(self):
+        if (len(self.rows) == 0): return
+        self.writer.write_table(self.pa.Table.from_pylist(self.rows, self.schema))
+        self.rows.clear()
+
+    def close(self):
+        self.flush()
+        self.writer.close()
+        if (hasattr(self, "sink")): self.sink.close()
+
+# Functions
+
+def run_episode(job: tuple[int, int, dict]) -> dict:
+    episode, seed, options = job
+    start = time.perf_counter()
+    sim = Simulation(
+        dt=options["dt"],
+        plane_interval=options["plane_interval"],
+        rule_interval=options["rule_interval"],
+        points=options["points"],
+        guidance=options["guidance"],
+        seed=seed,
+    )
+    tally = Tally()
+    sim.subscribe(tally)
+    operator = Operator(sim, options["reaction"], options["misfire"], random.Random(seed))
+    telemetry = None if options["telemetry"] is None else Telemetry(sim, f"{options['telemetry']}-{seed}", options["telemetry_format"])
+    ticks = round(options["duration"]*1000/sim.dt)
+    for _ in range(ticks):
+        operator.act()
+        sim.step()
+    if (not telemetry is None): telemetry.close()
+    return {
+        "episode": episode,
+        "seed": seed,
+        "score": sim.score.get(),
+        "takedowns": tally.takedowns,
+        "wrongful_kills": tally.wrongful_kills,
+        "escapes": tally.escapes,
+        "returned": tally.returned,
+        "hostile_escapes": tally.hostile_escapes,
+        "rockets": operator.rockets,
+        "spawned": tally.spawned,
+        "ticks": ticks,
+        "wall_seconds": time.perf_counter()-start,
+    }
+
+def open_sink(path: str, batch_size: int):
+    if (path.endswith(".parquet") or path.endswith(".arrow")):
+        return ArrowSink(path, batch_size)
+    return CsvSink(path)
+
+def parse_point(value: str) -> tuple[str, int]:
+    name, _, number = value.partition("=")
+    if (not name in Score.points): raise argparse.ArgumentTypeError(f"unknown score constant {name!r}, expected one of {', '.join(Score.points)}")
+    try:
+        return name, int(number)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"{value!r} is not NAME=INTEGER")
+
+def main(argv: Optional[list[str]] = None):
+    parser = argparse.ArgumentParser(description="Run seeded headless episodes across a process pool.")
+    parser.add_argument("-n", "--episodes", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0, help="episode i runs with seed + i")
+    parser.add_argument("--episode", type=int, default=None, help="rerun a single episode index")
+    parser.add_argument("-j", "--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--duration", type=float, default=600, help="simulated seconds per episode")
+    parser.add_argument("--dt", type=float, default=1000/FPS, help="simulation step in milliseconds")
+    parser.add_argument("--plane-interval", type=int, nargs=2, default=(5000, 15000), metavar=("MIN", "MAX"))
+    parser.add_argument("--rule-interval", type=int, nargs=2, default=(30000, 60000), metavar=("MIN", "MAX"))
+    parser.add_argument("--points", nargs="*", type=parse_point, default=[], metavar="NAME=VALUE", help="override Score.points constants")
+    parser.add_argument("--guidance", choices=Simulation.guidance_modes, default="proportional")
+    parser.add_argument("--reaction", type=float, default=1500, help="operator decision interval in milliseconds")
+    parser.add_argument("--misfire", type=float, default=0.02, help="chance the operator engages a random plane")
+    parser.add_argument("-o", "--output", default="montecarlo.parquet", help=".parquet, .arrow or .csv")
+    parser.add_argument("--batch-size", type=int, default=64, help="rows per record batch for columnar output")
+    parser.add_argument("--telemetry", metavar="PREFIX", help="stream each episode's events and per-tick tracks to PREFIX-SEED.NNNN.jsonl.gz (or .arrow)")
+    parser.add_argument("--telemetry-format", choices=FORMATS, default="jsonl")
+    args = parser.parse_args(argv)
+    if (args.episodes < 1): parser.error("-n/--episodes must be at least 1")
+    if (args.workers < 1): parser.error("-j/--workers must be at least 1")
+    if (not args.output.endswith(".csv") and importlib.util.find_spec("pyarrow") is None):
+        parser.error(f"{args.output} needs pyarrow (pip install -r requirements.txt), or pass -o with a .csv path")
+
+    options = {
+        "dt": args.dt,
+        "duration": args.duration,
+        "plane_interval": tuple(args.plane_interval),
+        "rule_interval": tuple(args.rule_interval),
+        "points": dict(args.points),
+        "guidance": args.guidance,
+        "reaction": args.reaction,
+        "misfire": args.misfire,
+        "telemetry": args.telemetry,
+        "telemetry_format": args.telemetry_format,
+    }
+    episodes = [args.episode] if args.episode is not None else range(args.episodes)
+    jobs = [(episode, args.seed+episode, options) for episode in episodes]
+
+    sink = open_sink(args.output, args.batch_size)
+    start = time.perf_counter()
+    done = 0
+    try:
+        with mp.Pool(min(args.workers, len(jobs))) as pool:
+            for row in pool.imap_unordered(run_episode, jobs):
+                sink.write(row)
+                done += 1
+                elapsed = time.perf_counter()-start
+                print(f"\r{done}/{len(jobs)} episodes, {done/elapsed:.2f} episodes/s", end="", file=sys.stderr)
+    finally:
+        sink.close()
+    elapsed = time.perf_counter()-start
+    print(file=sys.stderr)
+    print(f"{done} episodes in {elapsed:.2f}s ({done/elapsed:.2f} episodes/s) -> {args.output}")
+
+if __name__ == "__main__":
+    main()
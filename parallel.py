@@ -0,0 +1,170 @@
+# Plane integration split across worker processes over multiprocessing.shared_memory.
+# The plane store's hot columns live in shared blocks, each worker integrates and scans its own band of rows,
+# and everything with side effects (detections, escapes, handoffs, rule checks, explosions) is reconciled on the
+# main process once all workers have met at the barrier. Every row is computed by the same elementwise code as
+# the serial path, so the results match it bit for bit.
+import multiprocessing as mp
+from multiprocessing import shared_memory
+import threading
+import numpy as np
+from store import ComponentStore
+
+SHARED: tuple[str, ...] = ("position", "direction", "speed", "flags")
+RESULTS: tuple[tuple[str, type], ...] = (("escaped", np.bool_), ("site", np.int32), ("in_sweep", np.bool_), ("in_zone", np.bool_))
+
+# Functions
+
+def attach(names: dict[str, str], capacity: int, blocks: list) -> dict[str, np.ndarray]:
+    arrays = dict()
+    for name, dtype, shape in layout(capacity):
+        block = shared_memory.SharedMemory(names[name])
+        blocks.append(block)
+        arrays[name] = np.ndarray(shape, dtype, block.buf)
+    return arrays
+
+def layout(capacity: int) -> list[tuple[str, type, tuple[int, ...]]]:
+    return [
+        ("position", np.float64, (capacity, 2)),
+        ("direction", np.float64, (capacity, 2)),
+        ("speed", np.float64, (capacity,)),
+        ("flags", np.int32, (capacity,)),
+    ] + [(name, dtype, (capacity,)) for name, dtype in RESULTS]
+
+def work(worker: int, workers: int, world, control_name: str, sites: int, barrier, names):
+    from simulation import Plane
+    control_block = None
+    generation = -1
+    blocks: list = list()
+    arrays: dict[str, np.ndarray] = dict()
+    try:
+        control_block = shared_memory.SharedMemory(control_name)
+        control = np.ndarray((3+2*sites,), np.float64, control_block.buf)
+        while True:
+            barrier.wait()
+            dt, n, current = control[0], int(control[1]), int(control[2])
+            if (current < 0): break
+            if (current != generation):
+                arrays = dict()
+                for block in blocks: block.close()
+                blocks = list()
+                capacity, shared = names.get()
+                arrays = attach(shared, capacity, blocks)
+                generation = current
+            world.sweep_start = control[3:3+sites]
+            world.sweep_span = control[3+sites:3+2*sites]
+            lo, hi = n*worker//workers, n*(worker+1)//workers
+            escaped, site, in_sweep, in_zone = Plane.integrate(world, dt, arrays["position"][lo:hi], arrays["direction"][lo:hi], arrays["speed"][lo:hi], arrays["flags"][lo:hi])
+            arrays["escaped"][lo:hi] = escaped
+            arrays["site"][lo:hi] = site
+            arrays["in_sweep"][lo:hi] = in_sweep
+            arrays["in_zone"][lo:hi] = in_zone
+            barrier.wait()
+    except threading.BrokenBarrierError:
+        # Another worker failed; the main process tears the pool down and cleans up the shared blocks
+        pass
+    except BaseException:
+        # Breaking the barrier wakes the main process instead of leaving it waiting for this worker forever
+        barrier.abort()
+        raise
+    finally:
+        arrays = dict()
+        world.sweep_start = world.sweep_span = control = None
+        for block in blocks: block.close()
+        if (not control_block is None): control_block.close()
+
+# Classes
+class SectorPool:
+    def __init__(self, sim, workers: int, timeout: float = 30):
+        self.sim = sim
+        self.workers: int = workers
+        # Seconds the main process waits at a barrier before it treats the pool as hung
+        self.timeout: float = timeout
+        sites = len(sim.world.sweep_start)
+        self.sites: int = sites
+        self.control_block = shared_memory.SharedMemory(create=True, size=(3+2*sites)*8)
+        self.control: np.ndarray = np.ndarray((3+2*sites,), np.float64, self.control_block.buf)
+        self.control[:] = 0
+        self.generation: int = -1
+        self.store: ComponentStore = None
+        self.blocks: list[shared_memory.SharedMemory] = list()
+        self.arrays: dict[str, np.ndarray] = dict()
+        context = mp.get_context()
+        self.barrier = context.Barrier(workers+1)
+        self.queues = [context.Queue() for _ in range(workers)]
+        self.processes = [context.Process(target=work, args=(i, workers, sim.world, self.control_block.name, sites, self.barrier, self.queues[i]), daemon=True) for i in range(workers)]
+        for process in self.processes: process.start()
+
+    def share(self, store: ComponentStore):
+        # Moves the hot plane columns into fresh shared blocks; called again whenever the store has grown
+        self.arrays = dict()
+        for block in self.blocks:
+            block.close()
+            block.unlink()
+        self.blocks = list()
+        self.store = store
+        names = dict()
+        for name, dtype, shape in layout(store.capacity):
+            block = shared_memory.SharedMemory(create=True, size=max(1, int(np.prod(shape))*np.dtype(dtype).itemsize))
+            self.blocks.append(block)
+            names[name] = block.name
+            array = self.arrays[name] = np.ndarray(shape, dtype, block.buf)
+            if (name in SHARED):
+                array[:] = getattr(store, name)
+                setattr(store, name, array)
+        self.generation += 1
+        for queue in self.queues: queue.put((store.capacity, names))
+
+    def integrate(self, store: ComponentStore) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        if (any(getattr(store, name) is not self.arrays.get(name) for name in SHARED)): self.share(store)
+        world = self.sim.world
+        n = store.count
+        self.control[0] = self.sim.dt
+        self.control[1] = n
+        self.control[2] = self.generation
+        self.control[3:3+self.sites] = world.sweep_start
+        self.control[3+self.sites:] = world.sweep_span
+        # A dead worker never reaches the barrier, and waking the others through it can block on the dead one
+        if (not all(process.is_alive() for process in self.processes)): self.fail()
+        try:
+            self.barrier.wait(self.timeout)
+            self.barrier.wait(self.timeout)
+        except threading.BrokenBarrierError:
+            self.fail()
+        return tuple(self.arrays[name][:n].copy() for name, _ in RESULTS)
+
+    def fail(self):
+        # A worker raised (and broke the barrier), died, or missed the timeout: stop them all, free the shared blocks and report it
+        for process in self.processes: process.join(1)
+        exitcodes = [process.exitcode for process in self.processes]
+        for process in self.processes:
+            if (process.is_alive()): process.terminate()
+        for process in self.processes: process.join()
+        self.processes = list()
+        self.release()
+        if (self.sim.executor is self): self.sim.executor = None
+        raise RuntimeError(f"parallel plane integration failed (worker exit codes {exitcodes}, None = still running)")
+
+    def close(self):
+        if (len(self.processes) == 0): return
+        self.control[2] = -1
+        try:
+            if (not all(process.is_alive() for process in self.processes)): raise threading.BrokenBarrierError
+            self.barrier.wait(self.timeout)
+        except threading.BrokenBarrierError:
+            for process in self.processes: process.terminate()
+        for process in self.processes: process.join()
+        self.processes = list()
+        self.release()
+
+    def release(self):
+        # The store gets private copies of its columns back before the shared blocks go away
+        for name in SHARED:
+            if (not self.store is None and getattr(self.store, name) is self.arrays.get(name)): setattr(self.store, name, self.arrays[name].copy())
+        self.arrays = dict()
+        for block in self.blocks:
+            block.close()
+            block.unlink()
+        self.blocks = list()
+        self.control = None
+        self.control_block.close()
+        self.control_block.unlink()
@@ -0,0 +1,69 @@
+import math
+import numpy as np
+import pygame as pg
+import guidance
+
+# Classes
+class ParticleSystem:
+    # Fixed-capacity ring buffer: emitting into a full buffer overwrites the oldest particles first
+    sprites: dict[tuple[int, int], pg.Surface] = dict()
+
+    def __init__(self, sim, capacity: int = 16384):
+        self.sim = sim
+        self.capacity: int = capacity
+        self.head: int = 0
+        self.position: np.ndarray = np.zeros((capacity, 2))
+        self.radius: np.ndarray = np.zeros(capacity)
+        self.shade: np.ndarray = np.zeros(capacity, np.int32)
+        self.expires: np.ndarray = np.zeros(capacity)
+        self.alive: np.ndarray = np.zeros(capacity, bool)
+        self.evicted: int = 0
+
+    def emit(self, positions: np.ndarray, radii: np.ndarray, lifetimes: np.ndarray):
+        n = len(positions)
+        if (n == 0): return
+        if (n > self.capacity):
+            positions, radii, lifetimes = positions[-self.capacity:], radii[-self.capacity:], lifetimes[-self.capacity:]
+            n = self.capacity
+        slots = (self.head + np.arange(n)) % self.capacity
+        self.evicted += int(self.alive[slots].sum())
+        self.position[slots] = positions
+        self.radius[slots] = radii
+        self.shade[slots] = self.sim.random.particles.integers(140, 241, n)
+        self.expires[slots] = self.sim.time + lifetimes
+        self.alive[slots] = True
+        self.head = int(slots[-1]+1) % self.capacity
+
+    def update(self):
+        self.alive &= self.expires > self.sim.time
+        index = np.flatnonzero(self.alive)
+        # A random walk spreads with the square root of the step count, so the jitter is scaled to match at any dt
+        self.position[index] += (self.sim.random.particles.random((len(index), 2))-0.5)/4*math.sqrt(self.sim.dt/guidance.TICK)
+
+    def count(self) -> int:
+        return int(self.alive.sum())
+
+    @staticmethod
+    def sprite(radius: int, shade: int) -> pg.Surface:
+        key = (radius, shade)
+        sprite = ParticleSystem.sprites.get(key)
+        if (sprite is None):
+            sprite = ParticleSystem.sprites[key] = pg.Surface((radius*2, radius*2))
+            sprite.set_colorkey((0, 0, 0))
+            pg.draw.circle(sprite, (shade, shade, shade), (radius, radius), radius)
+        return sprite
+
+    def draw(self, screen: pg.Surface) -> list[pg.Rect]:
+        # Radii are rounded to whole pixels so every particle maps onto a cached sprite, then everything goes out in one blits() call
+        radius = np.rint(self.radius).astype(np.int32)
+        index = np.flatnonzero(self.alive & (radius >= 1))
+        if (len(index) == 0): return []
+        radius = radius[index]
+        corner = np.rint(self.position[index]).astype(np.int32) - radius[:, None]
+        keys, inverse = np.unique(radius*256 + self.shade[index], return_inverse=True)
+        sprites = [ParticleSystem.sprite(key >> 8, key & 255) for key in keys.tolist()]
+        screen.blits([(sprites[i], position) for i, position in zip(inverse.tolist(), corner.tolist())], False)
+        # One bounding rect keeps the dirty list short however many particles there are
+        low = corner.min(axis=0)
+        high = (corner + 2*radius[:, None]).max(axis=0)
+        return [pg.Rect(low.tolist(), (high-low).tolist()).clip(screen.get_rect())]
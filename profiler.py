@@ -0,0 +1,92 @@
+from collections import deque
+from contextlib import nullcontext
+import gc
+import json
+import sys
+import time
+from typing import Optional
+
+# Classes
+class Section:
+    def __init__(self, profiler: "Profiler", name: str):
+        self.profiler: Profiler = profiler
+        self.name: str = name
+        self.start: int = 0
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter_ns()
+        self.profiler.record(self.name, self.start, end-self.start)
+        return False
+
+class Profiler:
+    def __init__(self, enabled: bool = False, history: int = 240, trace_limit: int = 200000):
+        self.enabled: bool = enabled
+        self.origin: int = time.perf_counter_ns()
+        self.null = nullcontext()
+        self.history: deque[dict] = deque(maxlen=history)
+        self.trace: deque[tuple[str, int, int]] = deque(maxlen=trace_limit)
+        self.counters: deque[tuple[int, dict[str, int]]] = deque(maxlen=trace_limit)
+        self.frame: dict[str, float] = dict()
+        self.frame_start: Optional[int] = None
+        self.frame_blocks: int = 0
+        self.frame_collections: int = 0
+
+    def section(self, name: str):
+        if (not self.enabled): return self.null
+        return Section(self, name)
+
+    def record(self, name: str, start: int, duration: int):
+        self.frame[name] = self.frame.get(name, 0) + duration/1e6
+        self.trace.append((name, start, duration))
+
+    def begin_frame(self):
+        if (not self.enabled): return
+        self.frame = dict()
+        self.frame_start = time.perf_counter_ns()
+        self.frame_blocks = sys.getallocatedblocks()
+        self.frame_collections = gc.get_stats()[0]["collections"]
+
+    def end_frame(self, counts: Optional[dict[str, int]] = None):
+        if (not self.enabled or self.frame_start is None): return
+        end = time.perf_counter_ns()
+        self.record("frame", self.frame_start, end-self.frame_start)
+        # Net change in live memory blocks and young-generation collections stand in for per-frame allocation churn
+        allocations = {
+            "allocated_blocks": sys.getallocatedblocks()-self.frame_blocks,
+            "gc_collections": gc.get_stats()[0]["collections"]-self.frame_collections,
+        }
+        self.history.append({"times": self.frame, "counts": dict(counts or {}), "allocations": allocations})
+        self.counters.append((self.frame_start, dict(counts or {}, **allocations)))
+        self.frame_start = None
+
+    def toggle(self) -> bool:
+        self.enabled = not self.enabled
+        self.frame_start = None
+        return self.enabled
+
+    def summary(self) -> dict:
+        times: dict[str, list[float]] = dict()
+        for frame in self.history:
+            for name, ms in frame["times"].items(): times.setdefault(name, list()).append(ms)
+        last = self.history[-1] if len(self.history) > 0 else {"counts": {}, "allocations": {}}
+        return {
+            "frames": len(self.history),
+            "sections": {name: {"avg_ms": sum(values)/len(values), "max_ms": max(values)} for name, values in times.items()},
+            "counts": last["counts"],
+            "allocations": last["allocations"],
+        }
+
+    def export_json(self, path: str):
+        with open(path, "w") as file:
+            json.dump({"summary": self.summary(), "frames": list(self.history)}, file, indent=1)
+
+    def export_chrome_trace(self, path: str):
+        # Loadable in chrome://tracing or https://ui.perfetto.dev
+        events = [{"name": name, "ph": "X", "ts": (start-self.origin)/1e3, "dur": duration/1e3, "pid": 0, "tid": 0} for name, start, duration in self.trace]
+        events += [{"name": "objects", "ph": "C", "ts": (start-self.origin)/1e3, "pid": 0, "tid": 0, "args": counts} for start, counts in self.counters]
+        with open(path, "w") as file:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, file)
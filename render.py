@@ -0,0 +1,165 @@
+from collections import OrderedDict
+import pygame as pg
+from pygame import Vector2
+from profiler import Profiler
+import assets
+from simulation import Simulation, W, H
+
+# Classes
+class TextRenderer:
+    def __init__(self, name: str = "Arial", size: int = 16, capacity: int = 256):
+        self.key: tuple[str, int, bool, bool] = (name, size, False, False)
+        self.capacity: int = capacity
+        self.surfaces: OrderedDict[tuple[str, tuple[int, int, int]], pg.Surface] = OrderedDict()
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+
+    def font(self) -> pg.font.Font:
+        return assets.manager.font(*self.key)
+
+    def render(self, text: str, color: tuple[int, int, int]) -> pg.Surface:
+        key = (text, tuple(color))
+        surface = self.surfaces.get(key)
+        if (not surface is None):
+            self.hits += 1
+            self.surfaces.move_to_end(key)
+            return surface
+        self.misses += 1
+        surface = self.surfaces[key] = self.font().render(text, True, color)
+        if (len(self.surfaces) > self.capacity):
+            self.surfaces.popitem(last=False)
+            self.evictions += 1
+        return surface
+
+    def blit(self, screen: pg.Surface, text: str, color: tuple[int, int, int], position: Vector2) -> pg.Rect:
+        return screen.blit(self.render(text, color), position)
+
+    def stats(self) -> dict[str, int]:
+        return {"size": len(self.surfaces), "hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+class Renderer:
+    max_dirty_rects: int = 256
+
+    def __init__(self, sim: Simulation, screen: pg.Surface):
+        self.sim: Simulation = sim
+        self.screen: pg.Surface = screen
+        self.text: TextRenderer = TextRenderer()
+        self.rules_point: Vector2 = Vector2(W*0.85, 120)
+        self.rules_panel: pg.Surface = None
+        self.rules_dirty: bool = True
+        self.background: pg.Surface = self.render_background()
+        self.dirty: list[pg.Rect] = list()
+        self.full_redraw: bool = True
+        sim.subscribe(self)
+
+    def __call__(self, event: str, source: object):
+        if (event == "rules_updated"): self.rules_dirty = True
+
+    def render_background(self) -> pg.Surface:
+        background = pg.Surface(self.screen.get_size())
+        background.fill((0, 0, 0))
+        self.sim.radar.draw_background(background)
+        pg.draw.line(background, (0, 150, 0), (W-100, 0), (W-100, H), 4)
+        pg.draw.line(background, (0, 150, 0), (W-100, 32), (W, 32), 4)
+        pg.draw.line(background, (0, 150, 0), (W-100, 112), (W, 112), 4)
+        return background
+
+    def draw(self, mouse_position: Vector2, alpha: float = 1) -> list[pg.Rect]:
+        screen = self.screen
+        updated: list[pg.Rect] = list()
+        if (self.rules_dirty): updated.append(self.draw_rules())
+        # Restore the background only where last frame drew something
+        if (self.full_redraw or len(self.dirty) > Renderer.max_dirty_rects):
+            screen.blit(self.background, (0, 0))
+        else:
+            for rect in self.dirty: screen.blit(self.background, rect, rect)
+
+        rects: list[pg.Rect] = list()
+        rects.append(self.text.blit(screen, f"S:{self.sim.score.get():010d}", (255,255,255), Vector2(W*0.85, 8)))
+        with self.sim.profiler.section("particles.draw"):
+            rects += self.sim.particles.draw(screen)
+        with self.sim.gamehandler.interpolated(alpha):
+            rects += self.draw_selected()
+            with self.sim.profiler.section("radar.draw"):
+                rects += self.sim.radar.draw(screen, mouse_position)
+            with self.sim.profiler.section("gamehandler.draw"):
+                rects += self.sim.gamehandler.draw(screen)
+
+        if (self.full_redraw or len(self.dirty)+len(rects) > Renderer.max_dirty_rects):
+            updated = [screen.get_rect()]
+        else:
+            updated += self.dirty + rects
+        self.full_redraw = False
+        self.dirty = rects
+        return updated
+
+    def draw_selected(self) -> list[pg.Rect]:
+        plane = self.sim.radar.selected_plane
+        if (plane is None): return []
+        intercept = self.sim.radar.predict_intercept(plane)
+        return [
+            self.text.blit(self.screen, f"{plane.country}-{plane.number}", (255, 255, 255), Vector2(W*0.85, 40)),
+            self.text.blit(self.screen, f"P:[{int(plane.position.x):3d}, {int(plane.position.y):03d}]", (255, 255, 255), Vector2(W*0.85, 56)),
+            self.text.blit(self.screen, f"V:[{int(plane.direction.x*plane.speed*100):04d}, {int(plane.direction.y*plane.speed*100):04d}]", (255, 255, 255), Vector2(W*0.85, 72)),
+            self.text.blit(self.screen, f"C:{plane.purpose}", (255, 255, 255), Vector2(W*0.85, 88)),
+            # Predicted time to intercept if a rocket were launched now, shown next to the plane on the scope
+            self.text.blit(self.screen, "--" if intercept is None else f"{intercept/1000:.1f}s", (255, 255, 255), plane.position + Vector2(8, -20)),
+        ]
+
+    def render_rules(self) -> pg.Surface:
+        panel = pg.Surface((W-self.rules_point.x, H-self.rules_point.y))
+        self.text.blit(panel, " NO-FLY LIST", (255, 255, 255), (0, 0))
+        i = 0
+        for rule in self.sim.flyRuler.rules:
+            i += 1
+            self.text.blit(panel, f"{rule.country}.{rule.purpose}.{rule.zone}", (255, 255, 255), (0, 24*i))
+        return panel
+
+    def draw_rules(self) -> pg.Rect:
+        # The panel only changes with FlyRuler.rules, so it lives in the background and is rebuilt on "rules_updated"
+        self.rules_dirty = False
+        self.rules_panel = self.render_rules()
+        rect = self.background.blit(self.rules_panel, self.rules_point)
+        self.screen.blit(self.background, rect, rect)
+        return rect
+
+    def draw_paused(self) -> list[pg.Rect]:
+        rect = self.text.blit(self.screen, "PAUSED", (255, 255, 255), (W/2, H/2))
+        # The label lands on the same spot every paused frame, so it only needs clearing once on resume
+        if (not rect in self.dirty): self.dirty.append(rect)
+        return [rect]
+
+class ProfilerOverlay:
+    def __init__(self, profiler: Profiler, position: Vector2 = Vector2(4, 4)):
+        self.profiler: Profiler = profiler
+        self.position: Vector2 = position
+        self.text: TextRenderer = TextRenderer("Consolas", 12, capacity=128)
+        self.visible: bool = False
+        self.lines: list[str] = list()
+        self.refresh_at: int = 0
+
+    def toggle(self):
+        self.visible = not self.visible
+        if (self.visible != self.profiler.enabled): self.profiler.toggle()
+
+    def refresh(self):
+        # Numbers are re-read a few times per second so the text cache is not flooded with one-off strings
+        summary = self.profiler.summary()
+        self.lines = [f"{'section':<18}{'avg':>7}{'max':>7}"]
+        for name, times in sorted(summary["sections"].items(), key=lambda x: -x[1]["avg_ms"]):
+            self.lines.append(f"{name:<18}{times['avg_ms']:>7.2f}{times['max_ms']:>7.2f}")
+        self.lines.append(" ".join(f"{name}:{count}" for name, count in summary["counts"].items()))
+        self.lines.append(" ".join(f"{name}:{value}" for name, value in summary["allocations"].items()))
+
+    def draw(self, screen: pg.Surface) -> list[pg.Rect]:
+        if (not self.visible): return []
+        if (pg.time.get_ticks() >= self.refresh_at):
+            self.refresh_at = pg.time.get_ticks() + 250
+            self.refresh()
+        surfaces = [self.text.render(line, (255, 255, 0)) for line in self.lines]
+        width = max([surface.get_width() for surface in surfaces] + [1])
+        panel = pg.Surface((width+8, 14*len(surfaces)+8), pg.SRCALPHA)
+        panel.fill((0, 0, 0, 180))
+        for i, surface in enumerate(surfaces): panel.blit(surface, (4, 4+14*i))
+        return [screen.blit(panel, self.position)]
@@ -0,0 +1,128 @@
+# Append-only binary session log and fast-seek playback.
+#
+# Layout (little endian):
+#   header   "AACR" u16 version, u64 seed, f64 dt
+#   record   u8 kind, u64 tick, u32 length, payload[length]
+#     COMMAND  u8 command, f32 x, f32 y   (x, y are NaN for commands without a position)
+#     SNAPSHOT zlib(pickle(Simulation))   (the simulation carries its own random streams)
+#     END      empty
+# Records only ever get appended, so a live recording can be memory-mapped and read while it grows.
+import argparse
+from bisect import bisect_right
+import math
+import mmap
+import pickle
+import struct
+import zlib
+from typing import Optional
+from pygame import Vector2
+from simulation import Simulation
+
+MAGIC = b"AACR"
+VERSION = 3
+HEADER = struct.Struct("<4sHQd")
+RECORD = struct.Struct("<BQI")
+COMMAND = struct.Struct("<Bff")
+
+KIND_COMMAND = 1
+KIND_SNAPSHOT = 2
+KIND_END = 3
+
+# Functions
+
+def snapshot(sim: Simulation) -> bytes:
+    return zlib.compress(pickle.dumps(sim, pickle.HIGHEST_PROTOCOL), 1)
+
+def restore(payload: bytes) -> Simulation:
+    return pickle.loads(zlib.decompress(payload))
+
+# Classes
+class Recorder:
+    def __init__(self, sim: Simulation, path: str, seed: int, snapshot_interval: int = 600):
+        self.sim: Simulation = sim
+        self.snapshot_interval: int = snapshot_interval
+        self.file = open(path, "wb")
+        self.file.write(HEADER.pack(MAGIC, VERSION, seed, sim.dt))
+        self.last_snapshot: int = -1
+        self.write_snapshot()
+        sim.subscribe(self)
+
+    def __call__(self, event: str, source: object):
+        if (event == "command"):
+            name, position = source
+            x, y = (math.nan, math.nan) if position is None else position
+            self.write(KIND_COMMAND, COMMAND.pack(Simulation.commands.index(name), x, y))
+        elif (event == "step" and self.sim.tick - self.last_snapshot >= self.snapshot_interval):
+            self.write_snapshot()
+
+    def write(self, kind: int, payload: bytes):
+        self.file.write(RECORD.pack(kind, self.sim.tick, len(payload)))
+        self.file.write(payload)
+
+    def write_snapshot(self):
+        self.last_snapshot = self.sim.tick
+        self.write(KIND_SNAPSHOT, snapshot(self.sim))
+        self.file.flush()
+
+    def close(self):
+        if (self.file.closed): return
+        self.write(KIND_END, b"")
+        self.file.close()
+        self.sim.unsubscribe(self)
+
+class Replay:
+    def __init__(self, path: str):
+        self.file = open(path, "rb")
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.seed, self.dt = HEADER.unpack_from(self.data, 0)
+        if (magic != MAGIC or version != VERSION): raise ValueError(f"{path} is not a version {VERSION} replay")
+        self.commands: dict[int, list[tuple[str, Optional[Vector2]]]] = dict()
+        self.snapshots: list[tuple[int, int, int]] = list()
+        self.end_tick: int = 0
+        self.index()
+
+    def index(self):
+        # Only record headers are read here; snapshot payloads stay in the mapping until a seek needs them
+        offset = HEADER.size
+        while offset + RECORD.size <= len(self.data):
+            kind, tick, length = RECORD.unpack_from(self.data, offset)
+            offset += RECORD.size
+            if (offset + length > len(self.data)): break
+            if (kind == KIND_COMMAND):
+                code, x, y = COMMAND.unpack_from(self.data, offset)
+                self.commands.setdefault(tick, list()).append((Simulation.commands[code], None if math.isnan(x) else Vector2(x, y)))
+            elif (kind == KIND_SNAPSHOT):
+                self.snapshots.append((tick, offset, length))
+            self.end_tick = max(self.end_tick, tick)
+            offset += length
+
+    def __call__(self, sim: Simulation):
+        for name, position in self.commands.get(sim.tick, ()):
+            sim.command(name, position)
+
+    def seek(self, tick: int) -> Simulation:
+        tick = max(0, min(tick, self.end_tick))
+        i = bisect_right([snapshot[0] for snapshot in self.snapshots], tick) - 1
+        _, offset, length = self.snapshots[max(i, 0)]
+        sim = restore(self.data[offset:offset+length])
+        sim.input_source = self
+        while sim.tick < tick: sim.step()
+        return sim
+
+    def close(self):
+        self.data.close()
+        self.file.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect or fast-forward a recorded session headless.")
+    parser.add_argument("path")
+    parser.add_argument("--seek", type=int, default=None, help="tick to fast-forward to (defaults to the end)")
+    args = parser.parse_args()
+    replay = Replay(args.path)
+    commands = sum(len(commands) for commands in replay.commands.values())
+    print(f"seed {replay.seed}, dt {replay.dt:.3f} ms, {replay.end_tick} ticks, {commands} commands, {len(replay.snapshots)} snapshots")
+    sim = replay.seek(replay.end_tick if args.seek is None else args.seek)
+    print(f"tick {sim.tick}: score {sim.score.get()}, {len(sim.gamehandler.get())} objects, {len(sim.flyRuler.rules)} rules")
+
+if __name__ == "__main__":
+    main()
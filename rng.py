@@ -0,0 +1,16 @@
+# Independent seeded random streams, one per subsystem, so drawing more from one never shifts another.
+import random
+import numpy as np
+
+# Classes
+class RandomStreams:
+    names: tuple[str, ...] = ("spawns", "rules", "particles", "callsigns")
+
+    def __init__(self, seed: int):
+        self.seed: int = seed
+        children = np.random.SeedSequence(seed).spawn(len(RandomStreams.names))
+        # Scalar draws are cheapest from random.Random; particles are created in bulk, so they get a NumPy generator
+        self.spawns: random.Random = random.Random(int(children[0].generate_state(1, np.uint64)[0]))
+        self.rules: random.Random = random.Random(int(children[1].generate_state(1, np.uint64)[0]))
+        self.particles: np.random.Generator = np.random.Generator(np.random.PCG64(children[2]))
+        self.callsigns: random.Random = random.Random(int(children[3].generate_state(1, np.uint64)[0]))
@@ -0,0 +1,783 @@
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from itertools import compress
+import math
+from typing import Callable, Iterator, Optional
+import numpy as np
+import pygame as pg
+from random import getrandbits
+from pygame import Vector2
+import guidance
+from particles import ParticleSystem
+from profiler import Profiler
+from rng import RandomStreams
+from spatial import SpatialGrid
+from world import World, RadarSite
+from store import ComponentStore, Column, VectorColumn, EnumColumn, FlagColumn, FLAG_ALIVE, FLAG_SPOTTED, FLAG_ALLOW_TAKEDOWN, FLAG_GET_BACK, FLAG_SELECTED, FLAG_REMOVED, FLAG_ENTERED_ZONE
+
+# Simulation Configuration
+W, H = 600, 500
+FPS = 60
+
+window_center: Vector2 = Vector2(W/2-50, H/2)
+
+# Functions
+
+def get_intersection_points(center, radius, point, direction):
+    px, py = point
+    cx, cy = center
+    dx, dy = direction
+    a = dx**2 + dy**2
+    b = 2 * ((px - cx) * dx + (py - cy) * dy)
+    c = (px - cx)**2 + (py - cy)**2 - radius**2
+    discriminant = b**2 - 4*a*c
+    if discriminant < 0:
+        return None, None
+    t1 = (-b + math.sqrt(discriminant)) / (2*a)
+    t2 = (-b - math.sqrt(discriminant)) / (2*a)
+    point1 = Vector2(int(px + t1*dx), int(py + t1*dy))
+    point2 = Vector2(int(px + t2*dx), int(py + t2*dy))
+    return point1, point2
+
+# Classes
+class GameObject(ABC):
+    detach_on_remove: bool = False
+    position = VectorColumn("position")
+
+    def __init__(self, sim: "Simulation", position: Vector2, draw_priorety: int):
+        super().__init__()
+        self.sim: Simulation = sim
+        self.id: int = sim.gamehandler.create_id()
+        self.store: ComponentStore = sim.gamehandler.store(type(self))
+        self.index: int = self.store.allocate(self)
+        self.position = position
+        self.draw_priorety = draw_priorety
+
+    @classmethod
+    @abstractmethod
+    def kernel(cls, sim: "Simulation", store: ComponentStore):
+        pass
+
+    @abstractmethod
+    def draw(self, screen: pg.Surface) -> Optional[pg.Rect]:
+        pass
+
+class GameHandler:
+    grid_cell_size: float = 20
+
+    def __init__(self, sim: "Simulation"):
+        self.sim: Simulation = sim
+        self.gameobjects: dict[int, GameObject] = dict()
+        self.spawned: list[GameObject] = list()
+        self.removed: list[GameObject] = list()
+        self.next_id: int = 0
+        self.stores: dict[type, ComponentStore] = dict()
+        self.grids: dict[type, SpatialGrid] = dict()
+        self.layers: dict[int, dict[GameObject, None]] = dict()
+
+    def get(self) -> list[GameObject]:
+        return list(self.gameobjects.values())
+
+    def entity(self, id: int) -> Optional[GameObject]:
+        return self.gameobjects.get(id)
+
+    def create_id(self) -> int:
+        self.next_id += 1
+        return self.next_id
+
+    def store(self, _type: type) -> ComponentStore:
+        store = self.stores.get(_type)
+        if (store is None):
+            store = self.stores[_type] = ComponentStore()
+        return store
+
+    def grid(self, _type: type) -> SpatialGrid:
+        grid = self.grids.get(_type)
+        if (grid is None):
+            grid = self.grids[_type] = SpatialGrid(GameHandler.grid_cell_size)
+            grid.sync(self.store(_type))
+        return grid
+
+    def add(self, gameobject: GameObject):
+        self.spawned.append(gameobject)
+
+    def remove(self, gameobject: GameObject):
+        store = gameobject.store
+        if (store.flags[gameobject.index] & FLAG_REMOVED): return
+        store.release(gameobject.index)
+        grid = self.grids.get(type(gameobject))
+        if (not grid is None): grid.remove(gameobject)
+        self.removed.append(gameobject)
+
+    def remove_rows(self, store: ComponentStore, indices: np.ndarray):
+        indices = indices[(store.flags[indices] & FLAG_REMOVED) == 0]
+        if (len(indices) == 0): return
+        store.release(indices)
+        owners = [store.owners[i] for i in indices.tolist()]
+        grid = self.grids.get(type(owners[0]))
+        if (not grid is None):
+            for owner in owners: grid.remove(owner)
+        self.removed += owners
+
+    def flush(self):
+        # Spawns and removals queued during a tick are applied here, never while a kernel is walking a store
+        if (len(self.spawned) > 0):
+            spawned, self.spawned = self.spawned, list()
+            for gameobject in spawned:
+                flags = gameobject.store.flags
+                if (flags[gameobject.index] & FLAG_REMOVED): continue
+                flags[gameobject.index] |= FLAG_ALIVE
+                gameobject.store.previous[gameobject.index] = gameobject.store.position[gameobject.index]
+                self.gameobjects[gameobject.id] = gameobject
+                layer = self.layers.get(gameobject.draw_priorety)
+                if (layer is None):
+                    layer = self.layers[gameobject.draw_priorety] = dict()
+                    self.layers = dict(sorted(self.layers.items()))
+                layer[gameobject] = None
+                grid = self.grids.get(type(gameobject))
+                if (not grid is None): grid.add(gameobject)
+        if (len(self.removed) > 0):
+            removed, self.removed = self.removed, list()
+            rows: dict[ComponentStore, list[int]] = dict()
+            for gameobject in removed:
+                self.gameobjects.pop(gameobject.id, None)
+                self.layers[gameobject.draw_priorety].pop(gameobject, None)
+                rows.setdefault(gameobject.store, list()).append(gameobject.index)
+            for store, indices in rows.items():
+                store.remove(indices)
+
+    def update(self):
+        profiler = self.sim.profiler
+        self.flush()
+        for store in self.stores.values():
+            store.previous[:store.count] = store.position[:store.count]
+        for _type, store in list(self.stores.items()):
+            with profiler.section("update." + _type.__name__):
+                _type.kernel(self.sim, store)
+                grid = self.grids.get(_type)
+                if (not grid is None): grid.sync(store)
+        with profiler.section("flush"):
+            self.flush()
+
+    @contextmanager
+    def interpolated(self, alpha: float) -> Iterator[None]:
+        # Positions are blended between the last two steps for drawing only, then the real columns are put back
+        if (alpha >= 1):
+            yield
+            return
+        positions = {store: store.position for store in self.stores.values()}
+        for store in self.stores.values():
+            n = store.count
+            blended = store.position.copy()
+            blended[:n] = store.previous[:n] + (store.position[:n]-store.previous[:n])*alpha
+            store.position = blended
+        try:
+            yield
+        finally:
+            for store, position in positions.items(): store.position = position
+
+    def counts(self) -> dict[str, int]:
+        counts = {_type.__name__: int(store.alive().sum()) for _type, store in self.stores.items()}
+        counts["Particles"] = self.sim.particles.count()
+        return counts
+
+    def draw(self, screen: pg.Surface) -> list[pg.Rect]:
+        rects = list()
+        for layer in self.layers.values():
+            for object in layer:
+                rect = object.draw(screen)
+                if (not rect is None): rects.append(rect)
+        return rects
+
+    def findClosest(self, _type: type, position: Vector2, max_distance: float = math.inf):
+        return self.grid(_type).nearest(position, max_distance)
+
+    def findInRadius(self, _type: type, position: Vector2, radius: float) -> list[GameObject]:
+        return self.grid(_type).query(position, radius)
+
+class Plane(GameObject):
+    detach_on_remove: bool = True
+    direction = VectorColumn("direction")
+    return_point = VectorColumn("target")
+    speed = Column("speed")
+    country = EnumColumn("country", "DE IT PT SI FR CZ RF UK BY TY AZ KZ".split())
+    purpose = EnumColumn("purpose", "CIVIL ARMY".split())
+    selected = FlagColumn(FLAG_SELECTED)
+    spotted = FlagColumn(FLAG_SPOTTED)
+    allow_takedown = FlagColumn(FLAG_ALLOW_TAKEDOWN)
+    get_back = FlagColumn(FLAG_GET_BACK)
+    site = Column("site")
+
+    def __init__(self, sim: "Simulation"):
+        rng = sim.random.spawns
+        position, heading, return_point = sim.world.spawn(rng)
+        super().__init__(sim, position, 3)
+        self.return_point = return_point
+        self.direction = (heading - self.position).normalize()
+        self.site = -1
+        self.speed = rng.random()/6
+        self.selected = False
+        self.default_color = (0, 255, 0)
+        self.selected_color = (255, 255, 255)
+        self.country = rng.choice(FlyRuler.countryes_get())
+        self.purpose = "CIVIL" if rng.random() <= 0.8 else "ARMY"
+        self.number = f"{sim.random.callsigns.randint(1,99999):05d}"
+        self.spotted = False
+        self.allow_takedown = False
+
+        self.get_back = False
+        self.allow_back: bool = True if rng.random() <= 0.65 else False
+
+    @staticmethod
+    def integrate(world: World, dt: float, position: np.ndarray, direction: np.ndarray, speed: np.ndarray, flags: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        # Purely elementwise over rows, so any band of rows can be integrated on its own (see parallel.SectorPool)
+        alive = (flags & FLAG_ALIVE) != 0
+        position[alive] += direction[alive]*speed[:, None][alive]*(dt/guidance.TICK)
+        escaped = alive & ~world.contains(position)
+        site, in_sweep, in_zone = world.scan(position)
+        return escaped, site, in_sweep, in_zone
+
+    @classmethod
+    def kernel(cls, sim: "Simulation", store: ComponentStore):
+        n = store.count
+        if (sim.executor is None):
+            escaped, site, in_sweep, in_zone = Plane.integrate(sim.world, sim.dt, store.position[:n], store.direction[:n], store.speed[:n], store.flags[:n])
+        else:
+            escaped, site, in_sweep, in_zone = sim.executor.integrate(store)
+        alive = store.alive()
+        flags = store.flags[:n]
+        position = store.position[:n]
+        direction = store.direction[:n]
+        spotted = alive & ((flags & FLAG_SPOTTED) == 0) & in_sweep
+        entered = alive & ((flags & FLAG_ENTERED_ZONE) == 0) & in_zone
+        flags[entered] |= FLAG_ENTERED_ZONE
+        # A plane moving from one site's coverage into another's keeps its track; the change is announced as a handoff
+        last_site = store.site[:n]
+        handoff = alive & ~escaped & (site != last_site) & (site >= 0) & (last_site >= 0)
+        last_site[alive] = site[alive]
+
+        back = alive & ((flags & FLAG_GET_BACK) != 0)
+        if (back.any()):
+            target = store.target[:n][back] - position[back]
+            target /= np.hypot(target[:, 0], target[:, 1])[:, None]
+            direction[back] += (target - direction[back])*(1-(1-0.001)**(sim.dt/guidance.TICK))
+
+        owners = store.owners
+        for i in np.flatnonzero(escaped): owners[i].escape()
+        for i in np.flatnonzero(spotted & ~escaped): owners[i].spot()
+        for i in np.flatnonzero(handoff): sim.emit("handoff", owners[i])
+        sim.flyRuler.check_rows(store, np.flatnonzero(entered & ~escaped))
+
+    def escape(self):
+        score = self.sim.score
+        if (self.get_back):
+            score.add(score.points["returned"])
+        else:
+            score.add(score.points["escaped"]) if not self.allow_takedown else score.sub(score.points["hostile_escaped"])
+        self.sim.emit("escape", self)
+        self.sim.gamehandler.remove(self)
+
+    def spot(self):
+        self.spotted = True
+        self.sim.emit("detection", self)
+        self.sim.gamehandler.add(Detection(self.sim, self.position))
+
+    def draw(self, screen: pg.Surface) -> Optional[pg.Rect]:
+        rect = pg.draw.line(screen, (0, 255, 0), self.position, self.return_point) if self.get_back else None
+        if (self.site < 0 or not self.spotted): return rect
+        site = self.sim.world.sites[self.site]
+        rects = list()
+        if self.selected:
+            out1, out2 = get_intersection_points(site.center, site.scope_radius, self.position, self.direction)
+            in1, in2 = get_intersection_points(site.center, site.zone_radius, self.position, self.direction)
+            if (in1 is None or in2 is None):
+                rects.append(pg.draw.line(screen, (0, 200, 0), out1, out2))
+            else:
+                rects.append(pg.draw.line(screen, (0, 200, 0), out1, in1))
+                rects.append(pg.draw.line(screen, (200, 0, 0), in1, in2))
+                rects.append(pg.draw.line(screen, (0, 200, 0), in2, out2))
+        else:
+            rects.append(pg.draw.line(screen, (0, 200, 0), self.position, self.position+self.direction*20))
+        rects.append(pg.draw.circle(screen, self.selected_color if self.selected else self.default_color, self.position, 2.5))
+        if (self.allow_takedown): rects.append(pg.draw.circle(screen, (255, 0, 0), self.position, 10, 2))
+        if (not rect is None): rects.append(rect)
+        return rects[0].unionall(rects[1:])
+
+    def takedown(self):
+        score = self.sim.score
+        if (not self.sim.world.nearest_site(self.position) is None and self.spotted):
+            if self.allow_takedown: score.add(score.points["takedown_civil"] if self.purpose == "CIVIL" else score.points["takedown_army"])
+            else: score.sub(score.points["wrongful_civil"] if self.purpose == "CIVIL" else score.points["wrongful_army"])
+        self.sim.emit("takedown", self)
+        self.sim.gamehandler.remove(self)
+
+    def on_message(self):
+        if (self.purpose == "CIVIL" and self.allow_back and self.allow_takedown and not self.get_back): self.get_back = True
+
+class Rocket(GameObject):
+    detach_on_remove: bool = True
+    direction = VectorColumn("direction")
+    speed = Column("speed")
+    target_speed = Column("target_speed")
+    launch_tick = Column("spawntick")
+    time_since_smoke = Column("timer")
+    stage = Column("stage")
+
+    def __init__(self, sim: "Simulation", target: Plane, origin: Vector2 = window_center):
+        super().__init__(sim, origin, 4)
+        self.target: Plane = target
+        self.target_speed = 0
+        self.speed = 0
+        self.launch_tick = sim.time
+        self.time_since_smoke = sim.time
+        self.calculateDirection()
+        self.stage = 0
+
+    @classmethod
+    def kernel(cls, sim: "Simulation", store: ComponentStore):
+        index = np.flatnonzero(store.alive())
+        if (len(index) == 0): return
+        rockets = [store.owners[i] for i in index]
+        # Targets still on the scope are gathered straight from the plane store; a removed target has a detached row and is lost
+        planes = sim.gamehandler.store(Plane)
+        tracked = np.array([rocket.target.store is planes for rocket in rockets])
+        rows = np.array([rocket.target.index for rocket in rockets])[tracked]
+        target = np.zeros((len(index), 2))
+        target_velocity = np.zeros((len(index), 2))
+        target[tracked] = planes.position[rows]
+        target_velocity[tracked] = planes.direction[rows]*planes.speed[rows, None]
+        position = store.position[index]
+        direction = store.direction[index]
+        speed = store.speed[index]
+        stage = store.stage[index]
+        scale = sim.dt/guidance.TICK
+
+        delta = target - position
+        distance = np.hypot(delta[:, 0], delta[:, 1])
+        explode = ((speed <= guidance.burnout_speed) & (stage >= 2)) | (tracked & (distance <= guidance.fuse_distance))
+        fly = ~explode
+        steered = guidance.steer(sim.guidance, direction, delta, target_velocity, speed, stage, scale)
+        direction = np.where(tracked[:, None], steered, direction)
+        speed = guidance.accelerate(speed, stage, scale)
+        position[fly] += direction[fly]*speed[fly, None]*scale
+        store.direction[index[fly]] = direction[fly]
+        store.position[index] = position
+        store.speed[index[fly]] = speed[fly]
+
+        smoke = fly & (store.timer[index] + 50 <= sim.time) & (stage != 3)
+        store.timer[index[smoke]] = sim.time
+
+        next_stage = guidance.stage_of(sim.time - store.spawntick[index])
+        store.stage[index] = next_stage
+        store.target_speed[index] = np.asarray(guidance.stage_speeds)[next_stage]
+
+        emitting = index[smoke]
+        n = len(emitting)
+        rng = sim.random.particles
+        sim.particles.emit(store.position[emitting] - store.direction[emitting]*5, rng.random(n)*np.where(stage[smoke] <= 2, 3, 1), rng.integers(2000, 5001, n))
+        for rocket in compress(rockets, explode):
+            rocket.explode()
+
+    def draw(self, screen: pg.Surface) -> Optional[pg.Rect]:
+        return pg.draw.line(screen, (160, 160, 160), self.position - self.direction*5, self.position + self.direction*5, 2)
+
+    def explode(self):
+        self.sim.gamehandler.add(Explosion(self.sim, self.position))
+        self.sim.gamehandler.remove(self)
+
+    def calculateDirection(self):
+        delta = self.target.position - self.position
+        if (delta.length_squared() > 0): self.direction = delta.normalize()
+
+class Explosion(GameObject):
+    radius = Column("radius")
+
+    def __init__(self, sim: "Simulation", position):
+        super().__init__(sim, position, 2)
+        sim.emit("explosion", self)
+        self.radius = 10
+        for target in sim.gamehandler.findInRadius(Plane, self.position, self.radius):
+            target.takedown()
+        rng = sim.random.particles
+        sim.particles.emit(np.array(self.position) + (rng.random((25, 2))-0.5)*20, rng.integers(2, 6, 25), rng.integers(3500, 6001, 25))
+
+    @classmethod
+    def kernel(cls, sim: "Simulation", store: ComponentStore):
+        alive = store.alive()
+        radius = store.radius[:store.count]
+        radius[alive] /= 1.1**(sim.dt/guidance.TICK)
+        sim.gamehandler.remove_rows(store, np.flatnonzero(alive & (radius <= 0.1)))
+
+    def draw(self, screen: pg.Surface) -> Optional[pg.Rect]:
+        return pg.draw.circle(screen, (255, 165, 0), self.position, self.radius)
+
+class Detection(GameObject):
+    radius = Column("radius")
+
+    def __init__(self, sim: "Simulation", position):
+        super().__init__(sim, position, 1)
+        self.radius = 15
+        self.color = (0, 255, 0)
+
+    @classmethod
+    def kernel(cls, sim: "Simulation", store: ComponentStore):
+        alive = store.alive()
+        radius = store.radius[:store.count]
+        radius[alive] -= 0.35*(sim.dt/guidance.TICK)
+        sim.gamehandler.remove_rows(store, np.flatnonzero(alive & (radius <= 1)))
+
+    def draw(self, screen: pg.Surface) -> Optional[pg.Rect]:
+        return pg.draw.circle(screen, self.color, self.position, self.radius)
+
+class Rule:
+    def __init__(self, country: str, purpose: str, zone: str):
+        self.country: str = country
+        self.purpose: str = purpose
+        self.zone: str = zone
+
+    def key(self) -> tuple[str, str, str]:
+        return (self.country, self.purpose, self.zone)
+
+class FlyRuler:
+    countryes: list[str] = Plane.country.values
+    purposes: list[str] = Plane.purpose.values
+    zones: list[str] = "ALL CNR".split()
+
+    def __init__(self, sim: "Simulation"):
+        self.sim: Simulation = sim
+        self.rules: list[Rule] = list()
+        # Rules compiled into counts per [zone, country, purpose]; a plane's verdict is a lookup into this table
+        self.table: np.ndarray = np.zeros((len(self.zones), len(self.countryes), len(self.purposes)), np.int32)
+
+    @staticmethod
+    def countryes_get() -> list[str]:
+        return FlyRuler.countryes
+
+    def is_duplicate(self, rule: Rule) -> bool:
+        for i in self.rules:
+            if ( (i.country == rule.country and i.purpose == rule.purpose and (i.zone == rule.zone or (rule.zone == "ALL" and i.zone == "CNR") ) ) ): return True
+        return False
+
+    def rule_add_random(self, attempts: int = 100) -> Optional[Rule]:
+        for _ in range(attempts):
+            rng = self.sim.random.rules
+            rule = Rule(rng.choice(self.countryes), rng.choice(self.purposes) if rng.random() <= 0.65 else "ALL", rng.choice(self.zones))
+            if (not self.is_duplicate(rule)):
+                self.rule_add(rule)
+                return rule
+        return None
+
+    def rule_remove_random(self) -> Optional[Rule]:
+        if (self.rules.__len__() == 0): return None
+        rule = self.sim.random.rules.choice(self.rules)
+        self.rule_remove(rule)
+        return rule
+
+    def rule_add(self, rule: Rule):
+        self.rules.append(rule)
+        self.compile(rule, 1)
+
+    def rule_remove(self, rule: Rule):
+        self.rules.remove(rule)
+        self.compile(rule, -1)
+
+    def compile(self, rule: Rule, count: int):
+        purposes = slice(None) if rule.purpose == "ALL" else self.purposes.index(rule.purpose)
+        self.table[self.zones.index(rule.zone), self.countryes.index(rule.country), purposes] += count
+        self.sim.emit("rules_updated", self)
+        self.check_planes(rule)
+
+    def verdict(self, country: np.ndarray, purpose: np.ndarray, entered: np.ndarray) -> np.ndarray:
+        return (self.table[0, country, purpose] > 0) | (entered & (self.table[1, country, purpose] > 0))
+
+    def check_rows(self, store: ComponentStore, rows: np.ndarray):
+        if (len(rows) == 0): return
+        flags = store.flags[rows]
+        allow = self.verdict(store.country[rows], store.purpose[rows], (flags & FLAG_ENTERED_ZONE) != 0)
+        store.flags[rows] = np.where(allow, flags | FLAG_ALLOW_TAKEDOWN, flags & ~FLAG_ALLOW_TAKEDOWN)
+        changed = allow != ((flags & FLAG_ALLOW_TAKEDOWN) != 0)
+        if (changed.any()): self.sim.emit("verdict", (store, rows[changed], allow[changed]))
+
+    def check_planes(self, rule: Optional[Rule] = None):
+        # Only planes the rule can match need a new verdict
+        store = self.sim.gamehandler.store(Plane)
+        n = store.count
+        affected = (store.flags[:n] & FLAG_REMOVED) == 0
+        if (not rule is None):
+            affected &= store.country[:n] == self.countryes.index(rule.country)
+            if (rule.purpose != "ALL"): affected &= store.purpose[:n] == self.purposes.index(rule.purpose)
+        self.check_rows(store, np.flatnonzero(affected))
+
+    def check_plane(self, plane: Plane):
+        self.check_rows(plane.store, np.array([plane.index]))
+
+class Score:
+    points: dict[str, int] = {
+        "escaped": 10,
+        "returned": 30,
+        "hostile_escaped": 25,
+        "takedown_civil": 10,
+        "takedown_army": 25,
+        "wrongful_civil": 25,
+        "wrongful_army": 60,
+    }
+
+    def __init__(self, sim: "Simulation", points: Optional[dict[str, int]] = None):
+        self.sim: Simulation = sim
+        self.score = 0
+        self.points: dict[str, int] = dict(Score.points, **(points or {}))
+
+    def add(self, value: int):
+        self.score += abs(value)
+        self.sim.emit("score_change", self)
+
+    def sub(self, value: int):
+        self.score -= abs(value)
+        self.sim.emit("score_change", self)
+
+    def get(self) -> int:
+        return self.score
+
+class Radar:
+    def __init__(self, sim: "Simulation"):
+        self.sim: Simulation = sim
+        self.draw_priorety = 5
+        self.selected_plane: Plane = None
+
+    def update(self):
+        self.sim.world.update(self.sim.dt)
+
+    def site_for(self, plane: Plane) -> RadarSite:
+        # The site tracking a plane launches at it; untracked planes fall back to the closest site
+        world = self.sim.world
+        if (plane.site >= 0): return world.sites[plane.site]
+        return min(world.sites, key=lambda site: (site.center-plane.position).length_squared())
+
+    def select_plane(self, position: Vector2):
+        if (not self.selected_plane is None):
+            self.selected_plane.selected = False
+            self.selected_plane = None
+        plane = self.sim.gamehandler.findClosest(Plane, position, 10)
+        if (not plane is None):
+            self.selected_plane = plane
+            plane.selected = True
+            self.sim.emit("selection", plane)
+
+    def predict_intercept(self, plane: Plane) -> Optional[float]:
+        return guidance.predict(self.site_for(plane).center, plane.position, plane.direction*plane.speed, self.sim.dt)
+
+    def launch_rocket(self):
+        rocket = Rocket(self.sim, self.selected_plane, self.site_for(self.selected_plane).center)
+        self.sim.gamehandler.add(rocket)
+        self.sim.emit("launch", rocket)
+        self.selected_plane.selected = False
+        self.selected_plane = None
+
+    def destroy_rocket(self, position: Vector2):
+        rocket = self.sim.gamehandler.findClosest(Rocket, position, 10)
+        if (not rocket is None):
+            rocket.explode()
+
+    def send_message(self):
+        self.selected_plane.on_message()
+        self.sim.emit("message", self.selected_plane)
+
+    def draw_background(self, screen: pg.Surface):
+        for site in self.sim.world.sites: site.draw_background(screen)
+
+    def draw(self, screen: pg.Surface, mouse_position: Vector2) -> list[pg.Rect]:
+        time = self.sim.time
+        world = self.sim.world
+        rects = list()
+        if (not self.selected_plane is None):
+            site = self.site_for(self.selected_plane)
+            center, reach = site.center, site.scope_radius
+            norm: Vector2 = (self.selected_plane.position-center).normalize()
+            dist: Vector2 = (self.selected_plane.position-center).length()+math.sin(time/100)*10
+            rects.append(pg.draw.lines(screen, (0, 150, 0), True, [center, norm*reach+center+norm.rotate(90)*5, norm*reach+center-norm.rotate(90)*5]))
+            rects.append(pg.draw.line(screen, (0, 150, 0), center+norm*dist+norm.rotate(90)*dist*0.02, center+norm*dist-norm.rotate(90)*dist*0.02))
+        else:
+            site = world.sites[world.nearest_site(mouse_position) or 0]
+            center, reach = site.center, site.scope_radius
+            if (not (mouse_position-center).length() == 0):
+                norm: Vector2 = (mouse_position-center).normalize()
+                dist: Vector2 = abs(math.sin(time/200))*reach
+                rects.append(pg.draw.lines(screen, (0, 150, 0), True, [center, norm*reach+center+norm.rotate(90)*5, norm*reach+center-norm.rotate(90)*5]))
+                rects.append(pg.draw.line(screen, (0, 150, 0), center+norm*dist+norm.rotate(90)*dist*0.02, center+norm*dist-norm.rotate(90)*dist*0.02))
+        rects += world.draw(screen)
+        return rects
+
+class Simulation:
+    max_steps_per_advance: int = 240
+    guidance_modes: tuple[str, ...] = guidance.MODES
+    commands: tuple[str, ...] = ("select_plane", "launch_rocket", "send_message", "destroy_rocket", "rule_add_random", "rule_remove_random", "spawn_plane")
+
+    def __init__(self, dt: float = 1000/FPS, clock: Optional[Callable[[], float]] = None,
+                 plane_interval: tuple[int, int] = (5000, 15000), rule_interval: tuple[int, int] = (30000, 60000),
+                 points: Optional[dict[str, int]] = None, guidance: str = "proportional", world: Optional[World] = None,
+                 seed: Optional[int] = None):
+        if (not guidance in Simulation.guidance_modes): raise ValueError(f"unknown guidance {guidance!r}, expected one of {', '.join(Simulation.guidance_modes)}")
+        self.dt: float = dt
+        self.guidance: str = guidance
+        self.plane_interval: tuple[int, int] = plane_interval
+        self.rule_interval: tuple[int, int] = rule_interval
+        self.clock: Optional[Callable[[], float]] = clock
+        self.time: float = 0
+        self.tick: int = 0
+        self.paused: bool = False
+        self.accumulator: float = 0
+        self.last_clock: Optional[float] = None
+        self.observers: list[Callable[[str, object], None]] = list()
+        self.random: RandomStreams = RandomStreams(getrandbits(64) if seed is None else seed)
+        self.profiler: Profiler = Profiler()
+        self.input_source: Optional[Callable[[Simulation], None]] = None
+        self.inputs: list[tuple[str, Optional[Vector2]]] = list()
+        self.executor = None
+
+        # The default world is the single scope the game has always shown
+        self.world: World = World(W*0.85, H, [RadarSite(window_center, 245, H/2, H/4)], ("top", "bottom")) if world is None else world
+        self.gamehandler: GameHandler = GameHandler(self)
+        self.particles: ParticleSystem = ParticleSystem(self)
+        self.radar: Radar = Radar(self)
+        self.flyRuler: FlyRuler = FlyRuler(self)
+        self.score: Score = Score(self, points)
+
+        self.last_plane: float = 0
+        self.last_rule_change: float = 2500
+
+        self.gamehandler.add(Plane(self))
+
+    # Observers
+    def subscribe(self, observer: Callable[[str, object], None]):
+        self.observers.append(observer)
+
+    def unsubscribe(self, observer: Callable[[str, object], None]):
+        self.observers.remove(observer)
+
+    def emit(self, event: str, source: object = None):
+        for observer in self.observers:
+            observer(event, source)
+
+    # Stepping
+    def __getstate__(self) -> dict:
+        # Observers, clocks and input sources belong to the session, not to the simulated world
+        state = self.__dict__.copy()
+        state["observers"] = list()
+        state["clock"] = None
+        state["last_clock"] = None
+        state["profiler"] = None
+        state["input_source"] = None
+        state["inputs"] = list()
+        state["executor"] = None
+        return state
+
+    def __setstate__(self, state: dict):
+        self.__dict__.update(state)
+        self.profiler = Profiler()
+
+    def step(self):
+        if (len(self.inputs) > 0):
+            inputs, self.inputs = self.inputs, list()
+            for name, position in inputs: self.command(name, position)
+        if (not self.input_source is None): self.input_source(self)
+        with self.profiler.section("radar.update"):
+            self.radar.update()
+        # Plane Spawn
+        if (self.last_plane <= self.time):
+            self.last_plane = self.time + self.random.spawns.randint(*self.plane_interval)
+            self.spawn_plane()
+
+        # Rule Assign
+        if (self.last_rule_change <= self.time):
+            self.last_rule_change = self.time + self.random.rules.randint(*self.rule_interval)
+            if (self.flyRuler.rules.__len__() < 10):
+                if (self.flyRuler.rules.__len__()>5): self.flyRuler.rule_add_random() if self.random.rules.random() <= 0.70 else self.flyRuler.rule_remove_random()
+                else: self.flyRuler.rule_add_random()
+            else:
+                self.flyRuler.rule_remove_random()
+            self.emit("rule_changed", self.flyRuler)
+
+        with self.profiler.section("gamehandler.update"):
+            self.gamehandler.update()
+        with self.profiler.section("particles.update"):
+            self.particles.update()
+        self.time += self.dt
+        self.tick += 1
+        self.emit("step", self)
+
+    def run(self, ticks: int):
+        for _ in range(ticks):
+            self.step()
+
+    def advance(self, elapsed: Optional[float] = None) -> int:
+        if (elapsed is None):
+            if (self.clock is None): raise ValueError("advance() needs the elapsed milliseconds when the simulation has no clock")
+            now = self.clock()
+            elapsed = 0 if self.last_clock is None else now - self.last_clock
+            self.last_clock = now
+        if (self.paused): return 0
+        self.accumulator += elapsed
+        steps = 0
+        while self.accumulator >= self.dt and steps < Simulation.max_steps_per_advance:
+            self.step()
+            self.accumulator -= self.dt
+            steps += 1
+        if (steps == Simulation.max_steps_per_advance): self.accumulator = 0
+        return steps
+
+    def use_workers(self, workers: int):
+        # Plane integration runs on worker processes from here on; 0 goes back to the serial path
+        self.close()
+        if (workers > 0):
+            from parallel import SectorPool
+            self.executor = SectorPool(self, workers)
+
+    def close(self):
+        if (not self.executor is None):
+            self.executor.close()
+            self.executor = None
+
+    def pause(self):
+        self.paused = True
+
+    def resume(self):
+        self.paused = False
+
+    def alpha(self) -> float:
+        # How far the clock has run past the last step, for interpolating the drawn state
+        return min(self.accumulator/self.dt, 1)
+
+    # Commands
+    def post(self, name: str, position: Optional[Vector2] = None):
+        # Input from the display side waits here and is applied at the start of the next step
+        self.inputs.append((name, None if position is None else Vector2(position)))
+
+    def command(self, name: str, position: Optional[Vector2] = None):
+        self.emit("command", (name, position))
+        method = getattr(self, name)
+        method() if position is None else method(position)
+
+    def spawn_plane(self) -> Plane:
+        plane = Plane(self)
+        self.gamehandler.add(plane)
+        self.flyRuler.check_plane(plane)
+        self.emit("spawn", plane)
+        return plane
+
+    def select_plane(self, position: Vector2):
+        self.radar.select_plane(Vector2(position))
+
+    def launch_rocket(self):
+        if (not self.radar.selected_plane is None): self.radar.launch_rocket()
+
+    def send_message(self):
+        if (not self.radar.selected_plane is None): self.radar.send_message()
+
+    def destroy_rocket(self, position: Vector2):
+        self.radar.destroy_rocket(Vector2(position))
+
+    def rule_add_random(self):
+        self.flyRuler.rule_add_random()
+
+    def rule_remove_random(self):
+        self.flyRuler.rule_remove_random()
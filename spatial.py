@@ -0,0 +1,117 @@
+import math
+import numpy as np
+from store import ComponentStore, NO_CELL
+
+# Functions
+
+def cell_key(cx: int, cy: int) -> int:
+    return (cx << 32) + (cy & 0xFFFFFFFF)
+
+# Classes
+class SpatialGrid:
+    def __init__(self, cell_size: float):
+        self.cell_size: float = cell_size
+        self.cells: dict[int, set] = dict()
+        self.size: int = 0
+
+    def __len__(self) -> int:
+        return self.size
+
+    def key(self, position) -> int:
+        return cell_key(math.floor(position[0]/self.cell_size), math.floor(position[1]/self.cell_size))
+
+    def keys(self, positions: np.ndarray) -> np.ndarray:
+        cells = np.floor(positions/self.cell_size).astype(np.int64)
+        return (cells[:, 0] << 32) + (cells[:, 1] & 0xFFFFFFFF)
+
+    def insert(self, object, key: int):
+        cell = self.cells.get(key)
+        if (cell is None): cell = self.cells[key] = set()
+        cell.add(object)
+        self.size += 1
+
+    def discard(self, object, key: int):
+        cell = self.cells.get(key)
+        if (cell is None or not object in cell): return
+        cell.remove(object)
+        if (len(cell) == 0): del self.cells[key]
+        self.size -= 1
+
+    def add(self, object):
+        store: ComponentStore = object.store
+        key = self.key(store.position[object.index])
+        self.insert(object, key)
+        store.cell[object.index] = key
+
+    def remove(self, object):
+        store: ComponentStore = object.store
+        key = int(store.cell[object.index])
+        if (key == NO_CELL): return
+        self.discard(object, key)
+        store.cell[object.index] = NO_CELL
+
+    def sync(self, store: ComponentStore):
+        n = store.count
+        keys = self.keys(store.position[:n])
+        cell = store.cell[:n]
+        for i in np.flatnonzero(store.alive() & (keys != cell)):
+            if (cell[i] != NO_CELL): self.discard(store.owners[i], int(cell[i]))
+            self.insert(store.owners[i], int(keys[i]))
+        cell[:] = np.where(store.alive(), keys, cell)
+
+    def candidates(self, position, radius: float):
+        x0, y0 = math.floor((position[0]-radius)/self.cell_size), math.floor((position[1]-radius)/self.cell_size)
+        x1, y1 = math.floor((position[0]+radius)/self.cell_size), math.floor((position[1]+radius)/self.cell_size)
+        if ((x1-x0+1)*(y1-y0+1) > len(self.cells)):
+            for cell in self.cells.values(): yield from cell
+            return
+        for cx in range(x0, x1+1):
+            for cy in range(y0, y1+1):
+                cell = self.cells.get(cell_key(cx, cy))
+                if (not cell is None): yield from cell
+
+    @staticmethod
+    def ring(cx: int, cy: int, ring: int):
+        if (ring == 0):
+            yield cell_key(cx, cy)
+            return
+        for ox in range(-ring, ring+1):
+            yield cell_key(cx+ox, cy-ring)
+            yield cell_key(cx+ox, cy+ring)
+        for oy in range(-ring+1, ring):
+            yield cell_key(cx-ring, cy+oy)
+            yield cell_key(cx+ring, cy+oy)
+
+    def query(self, position, radius: float) -> list:
+        px, py = position
+        found = list()
+        for object in self.candidates(position, radius):
+            x, y = object.store.position[object.index]
+            if ((x-px)**2 + (y-py)**2 <= radius**2): found.append(object)
+        return found
+
+    def nearest(self, position, max_distance: float = math.inf):
+        if (self.size == 0): return None
+        px, py = position
+        cx, cy = math.floor(px/self.cell_size), math.floor(py/self.cell_size)
+        closest, closest_distance = None, math.inf
+        ring = 0
+        while True:
+            if ((2*ring+1)**2 > len(self.cells)*4):
+                # The ring has outgrown the occupied cells, finish with a scan over them instead
+                for cell in self.cells.values():
+                    for object in cell:
+                        x, y = object.store.position[object.index]
+                        distance = math.hypot(x-px, y-py)
+                        if (distance < closest_distance): closest, closest_distance = object, distance
+                break
+            for key in self.ring(cx, cy, ring):
+                cell = self.cells.get(key)
+                if (cell is None): continue
+                for object in cell:
+                    x, y = object.store.position[object.index]
+                    distance = math.hypot(x-px, y-py)
+                    if (distance < closest_distance): closest, closest_distance = object, distance
+            if (closest_distance <= ring*self.cell_size or ring*self.cell_size > max_distance): break
+            ring += 1
+        return closest if closest_distance <= max_distance else None
@@ -0,0 +1,128 @@
+import numpy as np
+from pygame import Vector2
+
+# Flags
+FLAG_ALIVE = 1 << 0
+FLAG_SPOTTED = 1 << 1
+FLAG_ALLOW_TAKEDOWN = 1 << 2
+FLAG_GET_BACK = 1 << 3
+FLAG_SELECTED = 1 << 4
+FLAG_REMOVED = 1 << 5
+FLAG_ENTERED_ZONE = 1 << 6
+
+NO_CELL = np.iinfo(np.int64).min
+
+# Classes
+class ComponentStore:
+    vectors: tuple[str, ...] = ("position", "previous", "direction", "target")
+    scalars: tuple[str, ...] = ("speed", "target_speed", "radius", "spawntick", "lifetime", "timer")
+    integers: tuple[str, ...] = ("stage", "country", "purpose", "flags", "site")
+    keys: tuple[str, ...] = ("cell",)
+
+    def __init__(self, capacity: int = 64):
+        self.capacity: int = capacity
+        self.count: int = 0
+        self.owners: list = list()
+        for name in self.vectors: setattr(self, name, np.zeros((capacity, 2)))
+        for name in self.scalars: setattr(self, name, np.zeros(capacity))
+        for name in self.integers: setattr(self, name, np.zeros(capacity, np.int32))
+        for name in self.keys: setattr(self, name, np.full(capacity, NO_CELL, np.int64))
+
+    def columns(self) -> tuple[str, ...]:
+        return self.vectors + self.scalars + self.integers + self.keys
+
+    def grow(self):
+        self.capacity *= 2
+        for name in self.columns():
+            column = getattr(self, name)
+            grown = np.zeros((self.capacity,) + column.shape[1:], column.dtype)
+            grown[:self.count] = column[:self.count]
+            setattr(self, name, grown)
+
+    def allocate(self, owner) -> int:
+        if (self.count == self.capacity): self.grow()
+        index = self.count
+        # New rows stay pending (not alive) until GameHandler applies its spawn queue
+        for name in self.columns(): getattr(self, name)[index] = 0
+        self.cell[index] = NO_CELL
+        self.owners.append(owner)
+        self.count += 1
+        return index
+
+    def release(self, index):
+        self.flags[index] = (self.flags[index] | FLAG_REMOVED) & ~FLAG_ALIVE
+
+    def alive(self) -> np.ndarray:
+        return (self.flags[:self.count] & FLAG_ALIVE) != 0
+
+    def detach(self, owner, index: int):
+        # Removed objects may still be referenced (e.g. a rocket's target), so they keep a private copy of their row
+        row = ComponentStore(1)
+        for name in self.columns(): getattr(row, name)[0] = getattr(self, name)[index]
+        row.count = 1
+        row.owners.append(owner)
+        owner.store = row
+        owner.index = 0
+
+    def remove(self, indices: list[int]):
+        dead = np.unique(np.asarray(indices, np.int64))
+        n = self.count
+        m = n - len(dead)
+        for i in dead:
+            owner = self.owners[i]
+            if (owner.detach_on_remove): self.detach(owner, i)
+        # Swap-remove in bulk: surviving rows from the tail fill the holes left below the new count
+        holes = dead[dead < m]
+        tail = np.ones(n-m, bool)
+        tail[dead[dead >= m]-m] = False
+        movers = np.flatnonzero(tail)+m
+        for name in self.columns():
+            column = getattr(self, name)
+            column[holes] = column[movers]
+        for hole, mover in zip(holes.tolist(), movers.tolist()):
+            owner = self.owners[mover]
+            self.owners[hole] = owner
+            owner.index = hole
+        del self.owners[m:]
+        self.count = m
+
+class Column:
+    def __init__(self, name: str):
+        self.name: str = name
+
+    def __get__(self, obj, objtype=None):
+        if (obj is None): return self
+        return getattr(obj.store, self.name)[obj.index].item()
+
+    def __set__(self, obj, value):
+        getattr(obj.store, self.name)[obj.index] = value
+
+class VectorColumn(Column):
+    def __get__(self, obj, objtype=None):
+        if (obj is None): return self
+        x, y = getattr(obj.store, self.name)[obj.index]
+        return Vector2(float(x), float(y))
+
+class EnumColumn(Column):
+    def __init__(self, name: str, values: list[str]):
+        super().__init__(name)
+        self.values: list[str] = values
+
+    def __get__(self, obj, objtype=None):
+        if (obj is None): return self
+        return self.values[getattr(obj.store, self.name)[obj.index]]
+
+    def __set__(self, obj, value: str):
+        getattr(obj.store, self.name)[obj.index] = self.values.index(value)
+
+class FlagColumn:
+    def __init__(self, flag: int):
+        self.flag: int = flag
+
+    def __get__(self, obj, objtype=None):
+        if (obj is None): return self
+        return bool(obj.store.flags[obj.index] & self.flag)
+
+    def __set__(self, obj, value: bool):
+        if (value): obj.store.flags[obj.index] |= self.flag
+        else: obj.store.flags[obj.index] &= ~self.flag
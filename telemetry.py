@@ -0,0 +1,226 @@
+# Streaming telemetry: engagement events and sampled plane tracks are handed to a bounded queue and written by a
+# background thread to rotating compressed files ({prefix}.0000.jsonl.gz, ... or {prefix}.0000.arrow, ...).
+# Plane tracks are sampled every tick by default. The game loop never waits on the writer: when the queue backs up,
+# track samples are thinned out first and events are dropped after that, and both are counted in the closing
+# "telemetry" record.
+# Example: python main.py --telemetry runs/session --telemetry-format arrow
+import gzip
+import json
+import queue
+import threading
+from typing import Optional
+import numpy as np
+
+FORMATS: tuple[str, ...] = ("jsonl", "arrow")
+# Simulation event -> telemetry event
+EVENTS: dict[str, str] = {
+    "spawn": "spawn",
+    "detection": "detection",
+    "handoff": "handoff",
+    "verdict": "verdict",
+    "message": "message",
+    "launch": "launch",
+    "takedown": "intercept",
+    "escape": "escape",
+    "score_change": "score",
+}
+MAX_STRIDE = 64
+
+# Classes
+class JsonlFile:
+    # One line per record; batched records (tracks, verdicts) keep their columns as lists on a single line
+    extension: str = "jsonl.gz"
+
+    def __init__(self, path: str):
+        self.raw = open(path, "wb")
+        self.file = gzip.GzipFile(fileobj=self.raw, mode="wb", compresslevel=5)
+
+    def write(self, records: list[dict]):
+        self.file.write("".join(json.dumps(record, separators=(",", ":")) + "\n" for record in records).encode())
+
+    def size(self) -> int:
+        return self.raw.tell()
+
+    def close(self):
+        self.file.close()
+        self.raw.close()
+
+class ArrowFile:
+    # Long format with a fixed schema: batched records are spread over one row per plane, anything else goes to "data"
+    extension: str = "arrow"
+
+    def __init__(self, path: str):
+        import pyarrow as pa
+        self.pa = pa
+        self.schema = pa.schema([("tick", pa.int64()), ("time", pa.float64()), ("event", pa.string()), ("id", pa.int64()), ("x", pa.float64()), ("y", pa.float64()), ("data", pa.string())])
+        self.sink = pa.OSFile(path, "wb")
+        self.writer = pa.ipc.new_stream(self.sink, self.schema, options=pa.ipc.IpcWriteOptions(compression="zstd"))
+
+    def write(self, records: list[dict]):
+        columns = {name: list() for name in self.schema.names}
+        for record in records:
+            record = dict(record)
+            tick, time, event = record.pop("tick"), record.pop("time"), record.pop("event")
+            id, x, y = record.pop("id", None), record.pop("x", None), record.pop("y", None)
+            if (isinstance(id, list)):
+                rows = [dict(zip(record, values)) for values in zip(*record.values())] if len(record) > 0 else [dict()]*len(id)
+            else:
+                id, x, y, rows = [id], [x], [y], [record]
+            columns["tick"] += [tick]*len(id)
+            columns["time"] += [time]*len(id)
+            columns["event"] += [event]*len(id)
+            columns["id"] += id
+            columns["x"] += x if not x is None else [None]*len(id)
+            columns["y"] += y if not y is None else [None]*len(id)
+            columns["data"] += [json.dumps(row, separators=(",", ":")) if len(row) > 0 else None for row in rows]
+        self.writer.write_batch(self.pa.record_batch([columns[name] for name in self.schema.names], schema=self.schema))
+
+    def size(self) -> int:
+        return self.sink.tell()
+
+    def close(self):
+        self.writer.close()
+        self.sink.close()
+
+class Telemetry:
+    def __init__(self, sim, prefix: str, format: str = "jsonl", track_interval: int = 1, capacity: int = 4096,
+                 rotate_bytes: int = 64*2**20, batch_size: int = 256):
+        self.prefix: str = prefix
+        self.file_type: type = JsonlFile if format == "jsonl" else ArrowFile
+        self.track_interval: int = track_interval
+        self.capacity: int = capacity
+        self.rotate_bytes: int = rotate_bytes
+        self.batch_size: int = batch_size
+        self.queue: queue.Queue = queue.Queue(capacity)
+        # Track samples are taken every track_interval*stride ticks; the stride doubles while the queue is backed up
+        self.stride: int = 1
+        self.sent: int = 0
+        self.dropped: int = 0
+        self.downsampled: int = 0
+        self.written: int = 0
+        self.part: int = 0
+        self.file = None
+        self.sim = None
+        self.score: int = 0
+        self.error: Optional[BaseException] = None
+        self.attach(sim)
+        self.open()
+        self.thread = threading.Thread(target=self.work, name="telemetry", daemon=True)
+        self.thread.start()
+
+    def attach(self, sim):
+        # Follows a replacement simulation (e.g. after a replay seek)
+        if (not self.sim is None): self.sim.unsubscribe(self)
+        self.sim = sim
+        self.score = sim.score.get()
+        sim.subscribe(self)
+
+    # Game loop side
+    def put(self, record: dict) -> bool:
+        try:
+            self.queue.put_nowait(record)
+            self.sent += 1
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def event(self, name: str, object, **data):
+        record = {"tick": self.sim.tick, "time": self.sim.time, "event": name}
+        if (not object is None):
+            position = object.position
+            record.update(id=object.id, x=position.x, y=position.y)
+        record.update(data)
+        self.put(record)
+
+    def tracks(self):
+        from simulation import Plane
+        sim = self.sim
+        if (sim.tick % (self.track_interval*self.stride) != 0): return
+        backlog = self.queue.qsize()
+        if (backlog > self.capacity//2 and self.stride < MAX_STRIDE):
+            self.stride *= 2
+            self.downsampled += 1
+            return
+        if (backlog < self.capacity//8 and self.stride > 1): self.stride //= 2
+        store = sim.gamehandler.store(Plane)
+        rows = np.flatnonzero(store.alive())
+        owners = store.owners
+        self.put({
+            "tick": sim.tick, "time": sim.time, "event": "tracks",
+            "id": [owners[i].id for i in rows.tolist()],
+            "x": store.position[rows, 0].tolist(),
+            "y": store.position[rows, 1].tolist(),
+            "site": store.site[rows].tolist(),
+            "flags": store.flags[rows].tolist(),
+        })
+
+    def __call__(self, event: str, source: object):
+        if (event == "step"):
+            self.tracks()
+            return
+        name = EVENTS.get(event)
+        if (name is None): return
+        if (event == "spawn"):
+            self.event(name, source, country=source.country, purpose=source.purpose, callsign=source.number, speed=source.speed)
+        elif (event in ("detection", "handoff")):
+            self.event(name, source, site=source.site)
+        elif (event == "verdict"):
+            store, rows, allow = source
+            self.put({
+                "tick": self.sim.tick, "time": self.sim.time, "event": name,
+                "id": [store.owners[i].id for i in rows.tolist()],
+                "x": store.position[rows, 0].tolist(),
+                "y": store.position[rows, 1].tolist(),
+                "allow": allow.tolist(),
+            })
+        elif (event == "message"):
+            self.event(name, source, get_back=source.get_back)
+        elif (event == "launch"):
+            self.event(name, source, target=source.target.id, site=source.target.site)
+        elif (event in ("takedown", "escape")):
+            self.event(name, source, purpose=source.purpose, allowed=source.allow_takedown, returned=source.get_back)
+        elif (event == "score_change"):
+            score = source.get()
+            self.event(name, None, score=score, delta=score-self.score)
+            self.score = score
+
+    # Writer side
+    def open(self):
+        self.file = self.file_type(f"{self.prefix}.{self.part:04d}.{self.file_type.extension}")
+        self.part += 1
+
+    def work(self):
+        running = True
+        while running:
+            records = [self.queue.get()]
+            while len(records) < self.batch_size:
+                try:
+                    records.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            if (records[-1] is None):
+                running = False
+                records.pop()
+            if (len(records) == 0 or not self.error is None): continue
+            try:
+                self.file.write(records)
+                self.written += len(records)
+                if (self.file.size() >= self.rotate_bytes):
+                    self.file.close()
+                    self.open()
+            except Exception as error:
+                # A broken disk must not take the game down with it; the error is raised again from close()
+                self.error = error
+
+    def close(self):
+        if (self.file is None): return
+        self.sim.unsubscribe(self)
+        summary = {"tick": self.sim.tick, "time": self.sim.time, "event": "telemetry", "sent": self.sent, "dropped": self.dropped, "downsampled": self.downsampled, "stride": self.stride}
+        # Shutting down may wait for the writer to catch up
+        self.queue.put(summary)
+        self.queue.put(None)
+        self.thread.join()
+        self.file.close()
+        self.file = None
+        if (not self.error is None): raise self.error
@@ -0,0 +1,141 @@
+import math
+from typing import Optional
+import numpy as np
+import pygame as pg
+from pygame import Vector2
+
+EDGES: tuple[str, ...] = ("top", "bottom", "left", "right")
+
+# Classes
+class RadarSite:
+    def __init__(self, center: Vector2, sweep_range: float = 245, scope_radius: float = 250, zone_radius: float = 125,
+                 radar_speed_tick: float = 1200, sweep_width: float = 200, phase: float = 0):
+        self.center: Vector2 = Vector2(center)
+        self.sweep_range: float = sweep_range
+        self.scope_radius: float = scope_radius
+        self.zone_radius: float = zone_radius
+        self.radar_speed_tick: float = radar_speed_tick
+        self.sweep_width: float = sweep_width
+        self.phase: float = phase
+
+    def draw_background(self, screen: pg.Surface):
+        pg.draw.circle(screen, (0, 150, 0), self.center, 3)
+        pg.draw.circle(screen, (0, 150, 0), self.center, self.scope_radius, 5)
+        pg.draw.circle(screen, (0, 150, 0), self.center, self.zone_radius, 2)
+
+    def draw(self, screen: pg.Surface, radar_tick: float) -> list[pg.Rect]:
+        lead = radar_tick/self.radar_speed_tick
+        trail = (radar_tick-self.sweep_width)/self.radar_speed_tick
+        return [
+            pg.draw.line(screen, (0, 150, 0), self.center, self.center+Vector2(math.cos(lead), math.sin(lead))*self.sweep_range),
+            pg.draw.line(screen, (0, 50, 0), self.center, self.center+Vector2(math.cos(trail), math.sin(trail))*self.sweep_range),
+        ]
+
+class World:
+    # Planes escape once they leave [0, width] x [0, height]. Sectors are a culling table, not independent units of work:
+    # the extent is tiled into squares and each lists the few sites whose scope reaches it, so a scan only tests a row
+    # against its own sector's sites instead of every site in the world.
+    def __init__(self, width: float, height: float, sites: list[RadarSite], spawn_edges: tuple[str, ...] = EDGES, sector_size: float = 500):
+        self.width: float = width
+        self.height: float = height
+        self.sites: list[RadarSite] = sites
+        self.spawn_edges: tuple[str, ...] = spawn_edges
+        self.sector_size: float = sector_size
+        self.columns: int = max(1, math.ceil(width/sector_size))
+        self.rows: int = max(1, math.ceil(height/sector_size))
+        # Per-site arrays carry one extra sentinel site far outside every world, used to pad the sector tables
+        self.center: np.ndarray = np.array([tuple(site.center) for site in sites] + [(1e18, 1e18)])
+        self.sweep_range2: np.ndarray = np.array([site.sweep_range**2 for site in sites] + [0])
+        self.zone_radius2: np.ndarray = np.array([site.zone_radius**2 for site in sites] + [0])
+        self.sweep_width: np.ndarray = np.array([site.sweep_width for site in sites] + [0])
+        self.radar_speed_tick: np.ndarray = np.array([site.radar_speed_tick for site in sites] + [1])
+        self.radar_tick: np.ndarray = np.array([site.phase for site in sites] + [0], float)
+        self.sweep_start: np.ndarray = np.zeros(len(sites)+1)
+        self.sweep_span: np.ndarray = np.zeros(len(sites)+1)
+        reach = np.array([self.sectors_within(site.center, site.scope_radius) for site in sites]).reshape(len(sites), -1).T
+        width = max(1, int(reach.sum(axis=1).max(initial=0)))
+        self.sector_sites: np.ndarray = np.full((self.sector_count(), width), len(sites), np.int32)
+        for sector, row in enumerate(reach):
+            found = np.flatnonzero(row)
+            self.sector_sites[sector, :len(found)] = found
+
+    @classmethod
+    def grid(cls, width: float, height: float, spacing: float = 400, spawn_edges: tuple[str, ...] = EDGES, **site_options) -> "World":
+        # Sites on a regular lattice with staggered sweep phases, one per sector; the default spacing lets neighbouring scopes overlap for handoffs
+        centers = [(x, y) for y in np.arange(spacing/2, height, spacing) for x in np.arange(spacing/2, width, spacing)]
+        radar_speed_tick = site_options.get("radar_speed_tick", 1200)
+        sites = [RadarSite(Vector2(x, y), phase=(i*397) % radar_speed_tick, **site_options) for i, (x, y) in enumerate(centers)]
+        return cls(width, height, sites, spawn_edges, spacing)
+
+    def sector_count(self) -> int:
+        return self.columns*self.rows
+
+    def sectors(self, positions: np.ndarray) -> np.ndarray:
+        cx = np.clip((positions[:, 0]//self.sector_size).astype(np.int64), 0, self.columns-1)
+        cy = np.clip((positions[:, 1]//self.sector_size).astype(np.int64), 0, self.rows-1)
+        return cy*self.columns+cx
+
+    def sectors_within(self, center: Vector2, radius: float) -> np.ndarray:
+        index = np.arange(self.sector_count())
+        column, row = index % self.columns, index // self.columns
+        # Border tiles reach out to infinity, since rows that have left the world are clipped into them
+        x0 = np.where(column == 0, -np.inf, column*self.sector_size)
+        x1 = np.where(column == self.columns-1, np.inf, (column+1)*self.sector_size)
+        y0 = np.where(row == 0, -np.inf, row*self.sector_size)
+        y1 = np.where(row == self.rows-1, np.inf, (row+1)*self.sector_size)
+        dx = np.clip(center.x, x0, x1)-center.x
+        dy = np.clip(center.y, y0, y1)-center.y
+        return dx*dx+dy*dy <= radius*radius
+
+    def contains(self, positions: np.ndarray) -> np.ndarray:
+        x, y = positions[:, 0], positions[:, 1]
+        return (x >= 0) & (x <= self.width) & (y >= 0) & (y <= self.height)
+
+    def update(self, dt: float):
+        last_radar_tick = self.radar_tick.copy()
+        self.radar_tick += dt
+        # The wedge covered this tick runs from the previous trailing edge to the new leading edge, so nothing slips between ticks
+        self.sweep_start = (last_radar_tick-self.sweep_width)/self.radar_speed_tick
+        self.sweep_span = (self.radar_tick-last_radar_tick+self.sweep_width)/self.radar_speed_tick
+
+    def scan(self, positions: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        # Per row: the nearest site in sweep range (-1 if none), whether any sweep passed over it this tick, whether it is inside any inner zone
+        site = self.sector_sites[self.sectors(positions)]
+        dx = positions[:, 0, None]-self.center[site, 0]
+        dy = positions[:, 1, None]-self.center[site, 1]
+        d2 = dx*dx+dy*dy
+        in_range = d2 <= self.sweep_range2[site]
+        in_zone = (d2 <= self.zone_radius2[site]).any(axis=1)
+        rows = np.arange(len(site))
+        nearest = np.where(in_range, d2, np.inf).argmin(axis=1)
+        site_of = np.where(in_range[rows, nearest], site[rows, nearest], -1).astype(np.int32)
+        sweep = np.zeros(len(positions), bool)
+        rows, k = np.nonzero(in_range)
+        if (len(rows) > 0):
+            s = site[rows, k]
+            angle = np.arctan2(dy[rows, k], dx[rows, k])
+            hit = (self.sweep_span[s] >= math.tau) | (np.mod(angle-self.sweep_start[s], math.tau) <= self.sweep_span[s])
+            sweep[rows[hit]] = True
+        return site_of, sweep, in_zone
+
+    def draw(self, screen: pg.Surface) -> list[pg.Rect]:
+        rects = list()
+        for site, radar_tick in zip(self.sites, self.radar_tick.tolist()): rects += site.draw(screen, radar_tick)
+        return rects
+
+    def nearest_site(self, position: Vector2, reach: str = "scope_radius") -> Optional[int]:
+        best, best_distance = None, math.inf
+        for i, site in enumerate(self.sites):
+            distance = (Vector2(position)-site.center).length()
+            if (distance <= getattr(site, reach) and distance < best_distance): best, best_distance = i, distance
+        return best
+
+    def spawn(self, rng) -> tuple[Vector2, Vector2, Vector2]:
+        # Entry point on a random edge, a heading point on the opposite edge and a return point back on the entry edge
+        w, h = self.width, self.height
+        edge = rng.choice(self.spawn_edges)
+        if (edge in ("top", "bottom")):
+            y = 0 if edge == "top" else h
+            return Vector2(w*rng.random(), y), Vector2(w*rng.random(), h-y), Vector2(rng.randint(0, int(w)), y)
+        x = 0 if edge == "left" else w
+        return Vector2(x, h*rng.random()), Vector2(w-x, h*rng.random()), Vector2(x, rng.randint(0, int(h)))